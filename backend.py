@@ -18,15 +18,19 @@ import secrets
 import base64
 from pathlib import Path
 from datetime import datetime, timedelta
-import pandas as pd
-from typing import Dict, List, Optional, Any
+import numpy as np
+from typing import TYPE_CHECKING, Dict, List, Optional, Any
 import shutil
 import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from dotenv import load_dotenv
 load_dotenv()
 
-# LangChain相关导入
-from langchain_rag_system import AdvancedContractRAG
+# LangChain相关导入（仅用于类型标注，避免登录页也加载整个LangChain）
+if TYPE_CHECKING:
+    from langchain_rag_system import AdvancedContractRAG
 
 # ==================================================
 # 密码哈希辅助函数 (使用 Python 内置库，无需外部 DLL)
@@ -111,6 +115,12 @@ class DatabaseManager:
             )
         """)
         
+        # 侧边栏最近文件查询按用户过滤，避免每次缓存失效都全表扫描
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_processed_files_user
+            ON processed_files (user_id, processing_status)
+        """)
+        
         # 缓存的总结表
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS cached_summaries (
@@ -155,6 +165,18 @@ class DatabaseManager:
             )
         """)
         
+        # 文档块向量缓存表（按内容哈希，跨文件/跨用户复用）
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (provider, model, text_hash)
+            )
+        """)
+        
         conn.commit()
         conn.close()
 
@@ -287,19 +309,98 @@ class UserManager:
 # 文件处理和缓存管理
 # ===========================
 
+class EmbeddingCache:
+    """文档块向量缓存（SQLite），供 RAG 系统的 embeddings 批量读写"""
+    
+    # SQLite 单条语句的参数数量有限，分批查询
+    BATCH_SIZE = 500
+    
+    def __init__(self, db_manager: DatabaseManager, provider: str = "openai"):
+        self.db = db_manager
+        self.provider = provider
+    
+    def get_many(self, model: str, text_hashes: List[str]) -> Dict[str, List[float]]:
+        """批量读取已缓存的向量"""
+        found = {}
+        conn = sqlite3.connect(self.db.db_path)
+        cursor = conn.cursor()
+        for start in range(0, len(text_hashes), self.BATCH_SIZE):
+            batch = text_hashes[start:start + self.BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            cursor.execute(f"""
+                SELECT text_hash, embedding
+                FROM embedding_cache
+                WHERE provider = ? AND model = ? AND text_hash IN ({placeholders})
+            """, (self.provider, model, *batch))
+            for text_hash, blob in cursor.fetchall():
+                found[text_hash] = np.frombuffer(blob, dtype=np.float32).tolist()
+        conn.close()
+        return found
+    
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        """批量写入向量"""
+        conn = sqlite3.connect(self.db.db_path)
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR REPLACE INTO embedding_cache (provider, model, text_hash, embedding)
+            VALUES (?, ?, ?, ?)
+        """, [
+            (self.provider, model, text_hash, np.asarray(vector, dtype=np.float32).tobytes())
+            for text_hash, vector in vectors.items()
+        ])
+        conn.commit()
+        conn.close()
+
+@dataclass
+class ProcessingJob:
+    """后台文件处理任务：页面轮询读取进度，处理线程写入结果"""
+    filename: str
+    status: str = "running"  # running / done / failed / cancelled
+    stage: str = "Queued"
+    result: Optional[Dict] = None
+    cancel_requested: bool = False
+
 class FileProcessor:
     """文件处理和缓存管理"""
     
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
+        self.embedding_cache = EmbeddingCache(db_manager)
+    
+    def start_processing_job(self, user_id: str, uploaded_file, rag_system: "AdvancedContractRAG") -> ProcessingJob:
+        """在后台线程中处理上传文件，立即返回可轮询的任务对象"""
+        job = ProcessingJob(filename=uploaded_file.name)
+        
+        def run():
+            try:
+                job.result = self.process_and_save_file(user_id, uploaded_file, rag_system, job)
+                if job.result.get("cancelled"):
+                    job.status = "cancelled"
+                else:
+                    job.status = "done" if job.result.get("success") else "failed"
+            except Exception as e:
+                job.result = {"success": False, "error": str(e)}
+                job.status = "failed"
+        
+        threading.Thread(target=run, name=f"process-{job.filename}", daemon=True).start()
+        return job
     
-    def process_and_save_file(self, user_id: str, uploaded_file, rag_system: AdvancedContractRAG) -> Dict:
-        """处理并保存上传的文件"""
+    def process_and_save_file(self, user_id: str, uploaded_file, rag_system: "AdvancedContractRAG",
+                              job: Optional[ProcessingJob] = None) -> Dict:
+        """处理并保存上传的文件（传入 job 时更新处理阶段，并在保存前响应取消请求）"""
+        
+        def stage(name: str) -> bool:
+            if job is None:
+                return True
+            job.stage = name
+            return not job.cancel_requested
         
         # ⭐ 关键修改1: 在处理新文件前,先清理旧数据
         print(f"🧹 Clearing previous contract data before processing new file...")
         rag_system.clear_all_documents()
         
+        stage("Saving upload")
+        
         # 生成文件ID
         file_id = hashlib.md5(
             f"{user_id}_{uploaded_file.name}_{datetime.now()}".encode()
@@ -313,29 +414,43 @@ class FileProcessor:
         contracts_dir.mkdir(parents=True, exist_ok=True)
         vector_dir.mkdir(parents=True, exist_ok=True)
         
+        # 上传文件已在内存中，只读取一次
+        pdf_bytes = uploaded_file.getvalue()
+        
         # 保存原始文件
         file_path = contracts_dir / f"{file_id}_{uploaded_file.name}"
         with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+            f.write(pdf_bytes)
         
         # 计算文件哈希
-        file_hash = hashlib.md5(uploaded_file.getbuffer()).hexdigest()
+        file_hash = hashlib.md5(pdf_bytes).hexdigest()
         
-        # 使用RAG系统处理文件
-        result = rag_system.load_pdf(str(file_path), use_cache=True)
+        def cancelled() -> Dict:
+            # 取消的上传不会写入数据库，删除已保存的原始文件
+            file_path.unlink(missing_ok=True)
+            return {"success": False, "cancelled": True, "error": "Processing cancelled"}
+        
+        # 使用RAG系统处理文件（直接解析内存中的内容；文档块向量批量计算并按内容哈希缓存）
+        if not stage("Parsing and embedding"):
+            return cancelled()
+        rag_system.set_embedding_store(self.embedding_cache)
+        result = rag_system.load_pdf(str(file_path), use_cache=True, pdf_bytes=pdf_bytes)
         
         # ⭐ 修复: 检查result是否为None
         if result is None:
             return {"success": False, "error": "load_pdf returned None - check RAG system"}
         
         if result.get("success", False):
+            if not stage("Saving"):
+                rag_system.clear_all_documents()
+                return cancelled()
+            
             # 保存向量存储
             vector_store_path = vector_dir / f"{file_id}_vectors"
             rag_system.save_vectorstore(str(vector_store_path))
             
-            # ⭐ 验证当前加载的文档
-            current_docs = rag_system.get_current_documents_info()
-            print(f"📋 Current documents after processing:\n{current_docs}")
+            # ⭐ 验证当前加载的文档（只取文档数，前端以 docs_loaded 标记判断是否可问答）
+            print(f"📋 Current documents after processing: {len(rag_system.documents)}")
             
             # 保存到数据库
             conn = sqlite3.connect(self.db.db_path)
@@ -399,7 +514,7 @@ class FileProcessor:
         conn.close()
         return files
     
-    def load_processed_file(self, user_id: str, file_id: str, rag_system: AdvancedContractRAG) -> bool:
+    def load_processed_file(self, user_id: str, file_id: str, rag_system: "AdvancedContractRAG") -> bool:
         """加载已处理的文件到RAG系统"""
         conn = sqlite3.connect(self.db.db_path)
         cursor = conn.cursor()
@@ -422,6 +537,9 @@ class FileProcessor:
             """, (file_id,))
             conn.commit()
             
+            # 重新加载时复用已缓存的文档块向量
+            rag_system.set_embedding_store(self.embedding_cache)
+            
             try:
                 # ⭐ 关键修改2: 彻底清理之前的所有数据
                 print(f"🧹 Clearing all previous data before loading new contract...")
@@ -439,12 +557,15 @@ class FileProcessor:
                     rag_system.load_vectorstore(vector_store_path, allow_dangerous_deserialization=True)
                     
                     # ⭐ 关键修改4: 重新加载文档到内存(确保文档列表正确)
-                    load_result = rag_system.load_pdf(processed_path, use_cache=True)
+                    # 索引已从磁盘加载：文档块直接取自其 docstore，不再读取文档缓存或重新构建向量存储
+                    if rag_system.restore_documents_from_vectorstore(processed_path):
+                        load_result = {"success": True}
+                    else:
+                        load_result = rag_system.load_pdf(processed_path, use_cache=True, build_index=False)
                     if load_result["success"]:
-                        # ⭐ 关键修改5: 验证当前加载的文档
-                        current_docs = rag_system.get_current_documents_info()
+                        # ⭐ 关键修改5: 验证当前加载的文档（只取文档数，前端以 docs_loaded 标记判断是否可问答）
                         print(f"✅ Successfully loaded: {filename}")
-                        print(f"📋 Current documents:\n{current_docs}")
+                        print(f"📋 Current documents: {len(rag_system.documents)}")
                         conn.close()
                         return True
                     else:
@@ -480,9 +601,83 @@ class FileProcessor:
 # 缓存管理
 # ===========================
 
+# 语义问答缓存的有效期（秒）；过期条目不再命中，避免长期返回旧答案
+SEMANTIC_QA_TTL = 7 * 24 * 3600
+# 进程内最多保留的文件语义索引数（按最近使用淘汰）
+SEMANTIC_QA_MAX_FILES = 32
+
+class SemanticQAIndex:
+    """单个文件的问答语义索引：L2归一化的问题向量矩阵 + 对应的答案"""
+    
+    def __init__(self, ttl: Optional[float] = SEMANTIC_QA_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()  # 后台预计算线程与页面线程可能同时写入
+        self.matrix = None  # (容量, d)，前 len(entries) 行有效
+        self.timestamps = None  # (容量,)
+        self.entries: List[Dict] = []
+    
+    def add(self, embedding: List[float], answer: str, sources: List = None,
+            ts: Optional[float] = None, qa_id: Optional[str] = None) -> None:
+        """添加一条问答（矩阵按容量翻倍扩展，避免每次 vstack 整体复制）"""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm == 0:
+            return
+        with self._lock:
+            self._append(vec / norm, datetime.now().timestamp() if ts is None else ts,
+                         {"answer": answer, "sources": sources or [], "qa_id": qa_id})
+    
+    def _append(self, vec: np.ndarray, ts: float, entry: Dict) -> None:
+        if self.matrix is not None and len(self.entries) == self.matrix.shape[0]:
+            # 扩容前先清除过期条目，腾出的位置直接复用
+            self._compact_expired()
+        n = len(self.entries)
+        if self.matrix is None:
+            self.matrix = np.empty((8, vec.shape[0]), dtype=np.float32)
+            self.timestamps = np.empty(8, dtype=np.float64)
+        elif n == self.matrix.shape[0]:
+            self.matrix = np.resize(self.matrix, (n * 2, self.matrix.shape[1]))
+            self.timestamps = np.resize(self.timestamps, n * 2)
+        self.matrix[n] = vec
+        self.timestamps[n] = ts
+        self.entries.append(entry)
+    
+    def _compact_expired(self) -> None:
+        """删除已过期的条目（调用方需持有锁）"""
+        if self.ttl is None:
+            return
+        n = len(self.entries)
+        keep = np.flatnonzero(self.timestamps[:n] >= datetime.now().timestamp() - self.ttl)
+        if keep.size == n:
+            return
+        self.matrix[:keep.size] = self.matrix[keep]
+        self.timestamps[:keep.size] = self.timestamps[keep]
+        self.entries = [self.entries[i] for i in keep]
+    
+    def search(self, embedding: List[float], threshold: float) -> Optional[Dict]:
+        """返回未过期、余弦相似度最高且不低于阈值的问答"""
+        n, matrix = len(self.entries), self.matrix
+        if n == 0:
+            return None
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0 or query.shape[0] != matrix.shape[1]:
+            return None
+        sims = matrix[:n] @ (query / norm)
+        if self.ttl is not None:
+            sims[self.timestamps[:n] < datetime.now().timestamp() - self.ttl] = -1.0
+        best = int(np.argmax(sims))
+        if sims[best] >= threshold:
+            return {**self.entries[best], "similarity": float(sims[best])}
+        return None
+
 class CacheManager:
     """管理各种缓存"""
     
+    # 问答语义索引（进程内共享，按 file_id；最多 SEMANTIC_QA_MAX_FILES 个，淘汰最久未使用的）
+    _semantic_qa_indexes: "OrderedDict[str, SemanticQAIndex]" = OrderedDict()
+    _semantic_qa_lock = threading.Lock()
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
     
@@ -570,15 +765,20 @@ class CacheManager:
         conn.commit()
         conn.close()
     
+    @staticmethod
+    def new_qa_id(user_id: str, question: str) -> str:
+        """生成问答历史ID（可先分配ID，再在后台写入记录）"""
+        return hashlib.md5(
+            f"{user_id}_{question}_{datetime.now()}".encode()
+        ).hexdigest()[:16]
+    
     def save_qa_history(self, user_id: str, file_id: str, question: str, 
-                       answer: str, sources: List = None) -> None:
-        """保存问答历史"""
+                       answer: str, sources: List = None, qa_id: Optional[str] = None) -> str:
+        """保存问答历史，返回 qa_id（可用于之后按需读取来源全文；可传入预先分配的 qa_id）"""
         conn = sqlite3.connect(self.db.db_path)
         cursor = conn.cursor()
         
-        qa_id = hashlib.md5(
-            f"{user_id}_{question}_{datetime.now()}".encode()
-        ).hexdigest()[:16]
+        qa_id = qa_id or self.new_qa_id(user_id, question)
         
         cursor.execute("""
             INSERT INTO qa_history
@@ -588,5 +788,81 @@ class CacheManager:
         
         conn.commit()
         conn.close()
+        
+        return qa_id
+    
+    def get_source_content(self, qa_id: str, source_index: int) -> Optional[str]:
+        """按需读取某条问答历史中第 source_index 个来源的全文"""
+        conn = sqlite3.connect(self.db.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute("SELECT sources FROM qa_history WHERE qa_id = ?", (qa_id,))
+        
+        result = cursor.fetchone()
+        conn.close()
+        
+        if not result or not result[0]:
+            return None
+        sources = json.loads(result[0])
+        if 0 <= source_index < len(sources):
+            return sources[source_index].get("content", "")
+        return None
+    
+    def _get_semantic_index(self, file_id: str, embedder=None) -> SemanticQAIndex:
+        """获取文件的语义索引；首次使用时从 qa_history 批量计算问题向量"""
+        with self._semantic_qa_lock:
+            index = self._semantic_qa_indexes.get(file_id)
+            if index is not None:
+                self._semantic_qa_indexes.move_to_end(file_id)
+        if index is None:
+            index = SemanticQAIndex()
+            if embedder is not None:
+                conn = sqlite3.connect(self.db.db_path)
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT question, answer, sources, CAST(strftime('%s', timestamp) AS REAL), qa_id
+                    FROM qa_history
+                    WHERE file_id = ?
+                    ORDER BY timestamp
+                """, (file_id,))
+                rows = cursor.fetchall()
+                conn.close()
+                
+                # 已过期的历史问答不再加载
+                if index.ttl is not None:
+                    oldest = datetime.now().timestamp() - index.ttl
+                    rows = [row for row in rows if row[3] is None or row[3] >= oldest]
+                if rows:
+                    vectors = embedder.embed_documents([row[0] for row in rows])
+                    for (_, answer, sources, ts, qa_id), vector in zip(rows, vectors):
+                        index.add(vector, answer, json.loads(sources) if sources else [], ts=ts, qa_id=qa_id)
+            with self._semantic_qa_lock:
+                index = self._semantic_qa_indexes.setdefault(file_id, index)
+                self._semantic_qa_indexes.move_to_end(file_id)
+                while len(self._semantic_qa_indexes) > SEMANTIC_QA_MAX_FILES:
+                    self._semantic_qa_indexes.popitem(last=False)
+        return index
+    
+    def get_semantic_qa(self, file_id: str, query_embedding: List[float],
+                        threshold: float = 0.95, embedder=None) -> Optional[Dict]:
+        """
+        查找语义相近的历史问答
+        
+        Args:
+            file_id: 文件ID
+            query_embedding: 当前问题的向量
+            threshold: 余弦相似度阈值
+            embedder: 用于首次加载历史问题向量的 embeddings 对象
+            
+        Returns:
+            {"answer", "sources", "qa_id", "similarity"}，未命中返回 None
+            （qa_id 为原问答历史记录，未写入历史的条目为 None）
+        """
+        return self._get_semantic_index(file_id, embedder).search(query_embedding, threshold)
+    
+    def add_semantic_qa(self, file_id: str, query_embedding: List[float],
+                        answer: str, sources: List = None, qa_id: Optional[str] = None) -> None:
+        """把新的问答加入语义索引（qa_id 指向已保存的问答历史，命中时可按需读取来源全文）"""
+        self._get_semantic_index(file_id).add(query_embedding, answer, sources, qa_id=qa_id)
 
 
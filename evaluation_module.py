@@ -10,25 +10,328 @@ import warnings
 warnings.filterwarnings('ignore', category=DeprecationWarning)
 
 import os
+import re
 import json
+import math
 import time
-import numpy as np
-from typing import List, Dict, Optional
+import hashlib
+import pickle
+import asyncio
+import argparse
+import logging
+import threading
+import unicodedata
+from statistics import fmean
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Dict, Optional, TYPE_CHECKING
+from dataclasses import dataclass, asdict, is_dataclass
+from functools import lru_cache, partial
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 load_dotenv()
 
-# ROUGE Score
+# Aho-Corasick keyword matching (optional, falls back to substring checks)
 try:
-    from rouge_score import rouge_scorer
-    ROUGE_AVAILABLE = True
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
 except ImportError:
-    ROUGE_AVAILABLE = False
-    print("⚠️ ROUGE Score not available. Install with: pip install rouge-score")
+    AHOCORASICK_AVAILABLE = False
 
-# RAG System
-from langchain_rag_system import AdvancedContractRAG
+# Fuzzy string similarity for extraction matching (optional)
+try:
+    from rapidfuzz import fuzz
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+# Fast JSON encoding for save_results (optional, falls back to json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+log = logging.getLogger(__name__)
+
+# RAG System (imported lazily in main(); only needed here for type hints)
+if TYPE_CHECKING:
+    from langchain_rag_system import AdvancedContractRAG
+
+# Max concurrent retriever calls (embedding + vector search are I/O bound)
+RETRIEVAL_MAX_WORKERS = 16
+
+# Max quick questions answered at once (each is a full LLM call, so latencies are measured under this load)
+QUICK_QUESTION_MAX_WORKERS = 4
+
+# Words ignored when measuring answer faithfulness
+STOP_WORDS = frozenset({
+    "the", "a", "an", "is", "are", "was", "were", "in", "on", "at",
+    "to", "for", "and", "or", "of", "by"
+})
+
+# Precompiled patterns for extraction comparison
+_DIGIT_RE = re.compile(r'\d+')
+_WS_RE = re.compile(r'\s+')
+
+# Disk cache for LLM/retriever responses, reused across evaluation runs
+EVAL_CACHE_DIR = ".rentalpeace_eval_cache"
+
+# Dimension weights in the overall score, shared by scoring and the breakdown tree
+_DIM_WEIGHTS = (
+    ("retrieval_quality", 0.20),
+    ("answer_quality", 0.25),
+    ("quick_questions_quality", 0.15),
+    ("source_citation", 0.12),
+    ("summary_quality", 0.12),
+    ("extraction_accuracy", 0.10),
+    ("efficiency", 0.06),
+)
+# Same pairs, heaviest first (stable, so ties keep the order above)
+_DIM_WEIGHTS_BY_WEIGHT = tuple(sorted(_DIM_WEIGHTS, key=lambda dw: dw[1], reverse=True))
+
+# Section rules used throughout the console report
+_EQ80 = "=" * 80
+_EQ60 = "=" * 60
+_DASH60 = "-" * 60
+
+# Dimension score bars are sliced from these instead of rebuilt per line
+_BAR_LENGTH = 40
+_FULL_BAR = "█" * _BAR_LENGTH
+_EMPTY_BAR = "░" * _BAR_LENGTH
+
+
+@lru_cache(maxsize=4096)
+def _normalize_for_comparison(text: str) -> str:
+    """Memoized body of RentalPeaceEvaluator._normalize_for_comparison (see cache_info())"""
+    # Apply the same normalization as the RAG system
+    text = text.lower().strip()
+
+    # Handle dollar sign
+    text = text.replace('$', 's$')
+
+    # Unicode normalization
+    text = unicodedata.normalize('NFKD', text)
+
+    # Remove extra spaces
+    return _WS_RE.sub(' ', text).strip()
+
+
+@lru_cache(maxsize=256)
+def _keyword_automaton(keywords: tuple):
+    """Build (once per keyword tuple) an Aho-Corasick automaton over the keywords"""
+    automaton = ahocorasick.Automaton()
+    for kw in keywords:
+        if kw:
+            automaton.add_word(kw, kw)
+    automaton.make_automaton()
+    return automaton
+
+
+def count_keywords(keywords: tuple, text: str) -> int:
+    """
+    Count how many (already lowercased) keywords occur in text
+
+    Uses a single Aho-Corasick pass when pyahocorasick is installed,
+    otherwise one substring check per keyword.
+    """
+    if not AHOCORASICK_AVAILABLE or not any(keywords):
+        return sum(1 for kw in keywords if kw in text)
+
+    found = {kw for _, kw in _keyword_automaton(keywords).iter(text)}
+    return sum(1 for kw in keywords if not kw or kw in found)
+
+
+def _is_partial_match(a: str, b: str) -> bool:
+    """
+    Substring containment in either direction, checked once
+
+    Only the shorter string can be contained in the longer one, so a
+    single search replaces `a in b or b in a`. Empty values never match.
+    """
+    if not a or not b:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    return a in b
+
+
+def _timing_stats(values: Iterable[float]):
+    """
+    Return (mean, min, max, population std) of timings in one streaming pass
+
+    Uses Welford's online update, so any iterable works and nothing is stored.
+    """
+    n = 0
+    mean = m2 = 0.0
+    low, high = math.inf, -math.inf
+    for x in values:
+        n += 1
+        delta = x - mean
+        mean += delta / n
+        m2 += delta * (x - mean)
+        low = min(low, x)
+        high = max(high, x)
+    if n == 0:
+        return 0, 0, 0, 0
+    return mean, low, high, math.sqrt(m2 / n)
+
+
+# Minimum rapidfuzz partial_ratio for a near-miss extraction to count as similar
+SIMILARITY_THRESHOLD = 85
+
+
+def _is_similar(a: str, b: str) -> bool:
+    """Best-aligned substring similarity (rapidfuzz partial_ratio) above SIMILARITY_THRESHOLD"""
+    if not a or not b:
+        return False
+    return fuzz.partial_ratio(a, b) >= SIMILARITY_THRESHOLD
+
+
+def _load_rouge_scorer():
+    """Import rouge_score on first use; returns a RougeScorer, or None if not installed"""
+    try:
+        from rouge_score import rouge_scorer
+    except ImportError:
+        log.warning("⚠️ ROUGE Score not available. Install with: pip install rouge-score")
+        return None
+
+    return rouge_scorer.RougeScorer(
+        ['rouge1', 'rouge2', 'rougeL'], 
+        use_stemmer=True
+    )
+
+
+@dataclass
+class RoleSummary:
+    """Quick question metrics for one role"""
+    __slots__ = ("total_questions", "avg_response_time", "avg_keyword_match",
+                 "avg_faithfulness", "fast_response_rate", "avg_rougeL_f1")
+
+    total_questions: int
+    avg_response_time: float
+    avg_keyword_match: float
+    avg_faithfulness: float
+    fast_response_rate: float
+    avg_rougeL_f1: Optional[float]
+
+    def to_dict(self) -> Dict:
+        """Plain dict for self.results (avg_rougeL_f1 omitted when not computed)"""
+        data = asdict(self)
+        if data["avg_rougeL_f1"] is None:
+            del data["avg_rougeL_f1"]
+        return data
+
+
+@dataclass
+class FieldResult:
+    """Extraction outcome for one ground-truth field (serialized as a dict by save_results)"""
+    __slots__ = ("expected", "extracted", "status", "score")
+
+    expected: str
+    extracted: str
+    status: str
+    score: float
+
+
+@dataclass
+class ExtractionResult:
+    """Information extraction accuracy metrics"""
+    __slots__ = ("exact_match_rate", "partial_match_rate", "miss_rate", "f1_score",
+                 "precision", "recall", "correct_fields", "partial_fields", "missing_fields",
+                 "total_fields", "extraction_time", "cache_hit", "similarity_matching",
+                 "field_details")
+
+    exact_match_rate: float
+    partial_match_rate: float
+    miss_rate: float
+    f1_score: float
+    precision: float
+    recall: float
+    correct_fields: int
+    partial_fields: int
+    missing_fields: int
+    total_fields: int
+    extraction_time: float
+    cache_hit: bool
+    similarity_matching: bool
+    field_details: Dict[str, FieldResult]
+
+    def to_dict(self) -> Dict:
+        """Plain dict for self.results (FieldResult records are kept as-is)"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass
+class EfficiencyResult:
+    """System efficiency metrics"""
+    __slots__ = ("avg_response_time", "min_response_time", "max_response_time",
+                 "std_response_time", "total_questions", "runs_per_question",
+                 "query_cache", "concurrent_runs", "avg_cold_response_time",
+                 "avg_warm_response_time")
+
+    avg_response_time: float
+    min_response_time: float
+    max_response_time: float
+    std_response_time: float
+    total_questions: int
+    runs_per_question: int
+    query_cache: bool
+    concurrent_runs: bool
+    avg_cold_response_time: Optional[float]
+    avg_warm_response_time: Optional[float]
+
+    def to_dict(self) -> Dict:
+        """Plain dict for self.results (cold/warm split omitted without the query cache)"""
+        return {name: getattr(self, name) for name in self.__slots__
+                if getattr(self, name) is not None}
+
+
+def _json_default(obj):
+    """json.dump fallback for dataclass results such as FieldResult"""
+    if is_dataclass(obj):
+        return asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class _QueryCache:
+    """
+    In-memory answer cache for repeated questions
+
+    Exact hits are keyed by a BLAKE2b digest of the question; otherwise the
+    question embedding is compared (cosine) against previously cached ones.
+    """
+    __slots__ = ("threshold", "_exact", "_vectors", "_responses")
+
+    def __init__(self, threshold: float = 0.95):
+        self.threshold = threshold
+        self._exact = {}
+        self._vectors = []
+        self._responses = []
+
+    @staticmethod
+    def _key(question: str) -> bytes:
+        return hashlib.blake2b(question.encode()).digest()
+
+    def get(self, question: str, vec: Optional[List[float]] = None):
+        """Return a cached response, or None on a miss"""
+        response = self._exact.get(self._key(question))
+        if response is not None or vec is None or not self._vectors:
+            return response
+
+        import numpy as np
+        matrix = np.asarray(self._vectors, dtype=np.float32)
+        query = np.asarray(vec, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        sims = matrix @ query / np.where(norms == 0, 1, norms)
+        best = int(np.argmax(sims))
+        return self._responses[best] if sims[best] >= self.threshold else None
+
+    def put(self, question: str, response, vec: Optional[List[float]] = None):
+        self._exact[self._key(question)] = response
+        if vec is not None:
+            self._vectors.append(vec)
+            self._responses.append(response)
 
 
 class RentalPeaceEvaluator:
@@ -44,24 +347,35 @@ class RentalPeaceEvaluator:
     6. Extraction Accuracy
     7. System Efficiency
     """
+
+    __slots__ = ("rag", "evaluation_mode", "verbose", "use_cache", "cache_dir",
+                 "rouge_scorer", "results")
     
-    def __init__(self, rag_system: AdvancedContractRAG, evaluation_mode: str = "fast"):
+    def __init__(self, rag_system: "AdvancedContractRAG", evaluation_mode: str = "fast",
+                 verbose: bool = True, quiet: bool = False, use_cache: bool = True):
         """
         Initialize the evaluator
         
         Args:
             rag_system: AdvancedContractRAG 
             evaluation_mode: ("fast", "accurate")
+            verbose: Print per-item details (e.g. returned/expected pages)
+            quiet: Only log warnings and errors (for CI / non-interactive runs)
+            use_cache: Reuse LLM/retriever responses from previous runs (False forces a refresh)
         """
         self.rag = rag_system
         self.evaluation_mode = evaluation_mode
+        self.verbose = verbose
+        self.use_cache = use_cache
+        self.cache_dir = Path(EVAL_CACHE_DIR)
+        if use_cache:
+            self.cache_dir.mkdir(exist_ok=True)
 
-        # Initialize ROUGE scorer
-        if ROUGE_AVAILABLE:
-            self.rouge_scorer = rouge_scorer.RougeScorer(
-                ['rouge1', 'rouge2', 'rougeL'], 
-                use_stemmer=True
-            )
+        # The module logger is process-wide, so a non-quiet evaluator also undoes an earlier quiet one
+        log.setLevel(logging.WARNING if quiet else logging.NOTSET)
+
+        # Initialize ROUGE scorer (None when rouge_score is not installed)
+        self.rouge_scorer = _load_rouge_scorer()
 
         # Initialize evaluation results storage
         self.results = {
@@ -99,28 +413,42 @@ class RentalPeaceEvaluator:
         Returns:
             Retrieval quality metrics dictionary
         """
-        print("\n" + "="*60)
-        print("🎯 1. RETRIEVAL QUALITY EVALUATION")
-        print("="*60)
+        log.info("\n" + _EQ60)
+        log.info("🎯 1. RETRIEVAL QUALITY EVALUATION")
+        log.info(_EQ60)
         
         if not test_cases:
-            print("⚠️ No test cases provided")
+            log.info("⚠️ No test cases provided")
             return {}
         
         mrr_scores = []
         recall_at_k_scores = {1: [], 3: [], 5: []}
         keyword_coverage_scores = []
+
+        # Fetch documents for all questions concurrently
+        def retrieve(question):
+            try:
+                return self._cached_call(
+                    "retrieve", question,
+                    lambda: self.rag.retriever.get_relevant_documents(question)
+                )[0]
+            except Exception as e:
+                return e
+
+        max_workers = min(RETRIEVAL_MAX_WORKERS, len(test_cases))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            docs_list = list(executor.map(retrieve, [test["question"] for test in test_cases]))
         
-        for i, test in enumerate(test_cases, 1):
+        for i, (test, docs) in enumerate(zip(test_cases, docs_list), 1):
             question = test["question"]
-            expected_keywords = test.get("expected_keywords", [])
+            expected_keywords = tuple(kw.lower() for kw in test.get("expected_keywords", []))
             expected_page = test.get("expected_page")
             
-            print(f"\n📝 Test {i}/{len(test_cases)}: {question[:60]}...")
+            log.info(f"\n📝 Test {i}/{len(test_cases)}: {question[:60]}...")
             
             try:
-
-                docs = self.rag.retriever.get_relevant_documents(question)
+                if isinstance(docs, Exception):
+                    raise docs
 
                 # Calculate MRR (Mean Reciprocal Rank)
                 reciprocal_rank = 0
@@ -128,11 +456,11 @@ class RentalPeaceEvaluator:
                     doc_page = doc.metadata.get("page", -1)
                     if expected_page and doc_page == expected_page:
                         reciprocal_rank = 1.0 / rank
-                        print(f"   ✅ Found at rank {rank} (MRR: {reciprocal_rank:.3f})")
+                        log.info(f"   ✅ Found at rank {rank} (MRR: {reciprocal_rank:.3f})")
                         break
                 
                 if reciprocal_rank == 0 and expected_page:
-                    print(f"   ❌ Expected page {expected_page} not found")
+                    log.info(f"   ❌ Expected page {expected_page} not found")
                 
                 mrr_scores.append(reciprocal_rank)
 
@@ -148,36 +476,35 @@ class RentalPeaceEvaluator:
                 # Calculate Keyword Coverage
                 if expected_keywords and docs:
                     top_doc_content = docs[0].page_content.lower()
-                    keywords_found = sum(1 for kw in expected_keywords 
-                                       if kw.lower() in top_doc_content)
+                    keywords_found = count_keywords(expected_keywords, top_doc_content)
                     coverage = keywords_found / len(expected_keywords)
                     keyword_coverage_scores.append(coverage)
-                    print(f"   📌 Keywords: {keywords_found}/{len(expected_keywords)} ({coverage:.1%})")
+                    log.info(f"   📌 Keywords: {keywords_found}/{len(expected_keywords)} ({coverage:.1%})")
                 
             except Exception as e:
-                print(f"   ⚠️ Error: {e}")
+                log.warning(f"   ⚠️ Error: {e}")
                 mrr_scores.append(0)
                 for k in [1, 3, 5]:
                     recall_at_k_scores[k].append(0)
         
         # Summarize results
         results = {
-            "mrr": np.mean(mrr_scores) if mrr_scores else 0,
-            "recall@1": np.mean(recall_at_k_scores[1]) if recall_at_k_scores[1] else 0,
-            "recall@3": np.mean(recall_at_k_scores[3]) if recall_at_k_scores[3] else 0,
-            "recall@5": np.mean(recall_at_k_scores[5]) if recall_at_k_scores[5] else 0,
-            "keyword_coverage": np.mean(keyword_coverage_scores) if keyword_coverage_scores else 0,
+            "mrr": fmean(mrr_scores) if mrr_scores else 0,
+            "recall@1": fmean(recall_at_k_scores[1]) if recall_at_k_scores[1] else 0,
+            "recall@3": fmean(recall_at_k_scores[3]) if recall_at_k_scores[3] else 0,
+            "recall@5": fmean(recall_at_k_scores[5]) if recall_at_k_scores[5] else 0,
+            "keyword_coverage": fmean(keyword_coverage_scores) if keyword_coverage_scores else 0,
             "total_tests": len(test_cases)
         }
         
-        print("\n" + "-"*60)
-        print("📊 RETRIEVAL SUMMARY:")
-        print(f"   MRR: {results['mrr']:.3f}")
-        print(f"   Recall@1: {results['recall@1']:.1%}")
-        print(f"   Recall@3: {results['recall@3']:.1%}")
-        print(f"   Recall@5: {results['recall@5']:.1%}")
-        print(f"   Keyword Coverage: {results['keyword_coverage']:.1%}")
-        print("-"*60)
+        log.info("\n" + _DASH60)
+        log.info("📊 RETRIEVAL SUMMARY:")
+        log.info(f"   MRR: {results['mrr']:.3f}")
+        log.info(f"   Recall@1: {results['recall@1']:.1%}")
+        log.info(f"   Recall@3: {results['recall@3']:.1%}")
+        log.info(f"   Recall@5: {results['recall@5']:.1%}")
+        log.info(f"   Keyword Coverage: {results['keyword_coverage']:.1%}")
+        log.info(_DASH60)
         
         self.results["retrieval_quality"] = results
         return results
@@ -204,12 +531,12 @@ class RentalPeaceEvaluator:
         Returns:
             Answer quality metrics dictionary
         """
-        print("\n" + "="*60)
-        print(f"💬 2. ANSWER QUALITY EVALUATION (Mode: {self.evaluation_mode.upper()})")
-        print("="*60)
+        log.info("\n" + _EQ60)
+        log.info(f"💬 2. ANSWER QUALITY EVALUATION (Mode: {self.evaluation_mode.upper()})")
+        log.info(_EQ60)
         
         if not qa_pairs:
-            print("⚠️ No QA pairs provided")
+            log.info("⚠️ No QA pairs provided")
             return {}
         
         predictions = []
@@ -217,17 +544,16 @@ class RentalPeaceEvaluator:
         faithfulness_scores = []
         answer_lengths = []
         response_times = []
+        cached_timings = 0
         
         for i, pair in enumerate(qa_pairs, 1):
             question = pair["question"]
             reference = pair["reference_answer"]
             
-            print(f"\n📝 Q{i}/{len(qa_pairs)}: {question[:60]}...")
+            log.info(f"\n📝 Q{i}/{len(qa_pairs)}: {question[:60]}...")
             
             try:
-                start_time = time.time()
-                result = self.rag.ask_question(question, use_compression=False)  
-                response_time = time.time() - start_time
+                result, response_time = self._timed_ask(question)
                 
                 answer = result["answer"]
                 sources = result.get("sources", [])
@@ -236,79 +562,102 @@ class RentalPeaceEvaluator:
                 references.append(reference)
                 answer_lengths.append(len(answer))
                 response_times.append(response_time)
+                cached = result.get("cached_timing", False)
+                cached_timings += cached
                 
-                print(f"   ⏱️  {response_time:.2f}s | 📏 {len(answer)} chars | 📚 {len(sources)} sources")
+                log.info(f"   ⏱️  {response_time:.2f}s{' (cached)' if cached else ''} | "
+                         f"📏 {len(answer)} chars | 📚 {len(sources)} sources")
                 
                 # Calculate Faithfulness
                 if sources:
-                    source_content = " ".join([s.get("content", "") for s in sources])
-                    answer_words = set(answer.lower().split())
-                    source_words = set(source_content.lower().split())
-
-                    # Filter stop words
-                    stop_words = {"the", "a", "an", "is", "are", "was", "were", "in", "on", "at", "to", "for", "and", "or", "of", "by"}
-                    answer_words -= stop_words
-                    source_words -= stop_words
+                    faithfulness = self._calculate_faithfulness(answer, sources)
                     
-                    if answer_words:
-                        faithfulness = len(answer_words & source_words) / len(answer_words)
+                    if faithfulness is not None:
                         faithfulness_scores.append(faithfulness)
-                        print(f"   ✅ Faithfulness: {faithfulness:.1%}")
+                        log.info(f"   ✅ Faithfulness: {faithfulness:.1%}")
                     else:
                         faithfulness_scores.append(0)
                 else:
                     faithfulness_scores.append(0)
                 
             except Exception as e:
-                print(f"   ⚠️ Error: {e}")
+                log.warning(f"   ⚠️ Error: {e}")
+                # Keep every per-question list aligned with qa_pairs
                 predictions.append("")
                 references.append(reference)
+                answer_lengths.append(0)
+                response_times.append(0.0)
+                faithfulness_scores.append(0.0)
 
         # Calculate ROUGE scores
         similarity_results = {}
-        if ROUGE_AVAILABLE:
-            print("\n🚀 Computing ROUGE Scores...")
+        if self.rouge_scorer is not None:
+            log.info("\n🚀 Computing ROUGE Scores...")
             rouge_scores = self._calculate_rouge_scores(predictions, references)
             similarity_results.update(rouge_scores)
-            print("   ✅ ROUGE Scores computed")
+            log.info("   ✅ ROUGE Scores computed")
         
         # Summarize results
         results = {
-            "avg_faithfulness": np.mean(faithfulness_scores) if faithfulness_scores else 0,
-            "avg_answer_length": np.mean(answer_lengths) if answer_lengths else 0,
-            "avg_response_time": np.mean(response_times) if response_times else 0,
+            "avg_faithfulness": fmean(faithfulness_scores) if faithfulness_scores else 0,
+            "avg_answer_length": fmean(answer_lengths) if answer_lengths else 0,
+            "avg_response_time": fmean(response_times) if response_times else 0,
+            # Response times replayed from the disk cache (measured on an earlier run)
+            "cached_timings": cached_timings,
             "total_qa_pairs": len(qa_pairs),
             **similarity_results
         }
         
-        print("\n" + "-"*60)
-        print("📊 ANSWER QUALITY SUMMARY:")
-        print(f"   Avg Faithfulness: {results['avg_faithfulness']:.1%}")
-        print(f"   Avg Answer Length: {results['avg_answer_length']:.0f} chars")
-        print(f"   Avg Response Time: {results['avg_response_time']:.2f}s")
+        log.info("\n" + _DASH60)
+        log.info("📊 ANSWER QUALITY SUMMARY:")
+        log.info(f"   Avg Faithfulness: {results['avg_faithfulness']:.1%}")
+        log.info(f"   Avg Answer Length: {results['avg_answer_length']:.0f} chars")
+        log.info(f"   Avg Response Time: {results['avg_response_time']:.2f}s")
+        if cached_timings:
+            log.info(f"   ({cached_timings}/{len(qa_pairs)} response times replayed from the cache)")
         
         if "rougeL_f1" in results:
-            print(f"   ROUGE-1 F1: {results['rouge1_f1']:.3f}")
-            print(f"   ROUGE-L F1: {results['rougeL_f1']:.3f}")
+            log.info(f"   ROUGE-1 F1: {results['rouge1_f1']:.3f}")
+            log.info(f"   ROUGE-L F1: {results['rougeL_f1']:.3f}")
         
-        print("-"*60)
+        log.info(_DASH60)
         
         self.results["answer_quality"] = results
         return results
     
+    def _calculate_faithfulness(self, answer: str, sources: List[Dict]) -> Optional[float]:
+        """
+        Share of (non stop word) answer words that appear in the sources
+
+        Sources are scanned one at a time and only the matched answer words
+        are kept, so the concatenated source text is never built.
+        Returns None when the answer has no countable words.
+        """
+        answer_words = set(answer.lower().split()) - STOP_WORDS
+        if not answer_words:
+            return None
+
+        matched_words = set()
+        for source in sources:
+            matched_words.update(answer_words.intersection(source.get("content", "").lower().split()))
+            if len(matched_words) == len(answer_words):
+                break
+
+        return len(matched_words) / len(answer_words)
+    
     def _calculate_rouge_scores(self, predictions: List[str], references: List[str]) -> Dict:
         """Calculate ROUGE scores"""
-        if not ROUGE_AVAILABLE or not predictions or not references:
+        if self.rouge_scorer is None or not predictions or not references:
             return {}
         
         rouge1_scores = []
         rouge2_scores = []
         rougeL_scores = []
         
-        for pred, ref in zip(predictions, references):
-            if not pred or not ref:
-                continue
-            
+        # Failed questions carry an empty prediction; score only complete pairs
+        scored_pairs = [(pred, ref) for pred, ref in zip(predictions, references) if pred and ref]
+        
+        for pred, ref in scored_pairs:
             try:
                 scores = self.rouge_scorer.score(ref, pred)
                 rouge1_scores.append(scores['rouge1'].fmeasure)
@@ -318,9 +667,9 @@ class RentalPeaceEvaluator:
                 continue
         
         return {
-            "rouge1_f1": np.mean(rouge1_scores) if rouge1_scores else 0,
-            "rouge2_f1": np.mean(rouge2_scores) if rouge2_scores else 0,
-            "rougeL_f1": np.mean(rougeL_scores) if rougeL_scores else 0
+            "rouge1_f1": fmean(rouge1_scores) if rouge1_scores else 0,
+            "rouge2_f1": fmean(rouge2_scores) if rouge2_scores else 0,
+            "rougeL_f1": fmean(rougeL_scores) if rougeL_scores else 0
         }
     
     # ========================================
@@ -341,36 +690,48 @@ class RentalPeaceEvaluator:
         Returns:
             Quick question quality metrics
         """
-        print("\n" + "="*60)
-        print("💡 3. QUICK QUESTION BUTTONS QUALITY EVALUATION")
-        print("="*60)
+        log.info("\n" + _EQ60)
+        log.info("💡 3. QUICK QUESTION BUTTONS QUALITY EVALUATION")
+        log.info(_EQ60)
         
         if not quick_question_tests:
-            print("⚠️ No quick question tests provided")
+            log.info("⚠️ No quick question tests provided")
             return {}
         
         if not isinstance(quick_question_tests, dict):
-            print(f"❌ Error: quick_questions must be a dict, got {type(quick_question_tests)}")
+            log.warning(f"❌ Error: quick_questions must be a dict, got {type(quick_question_tests)}")
             return {}
         
-        results_by_role = {}
+        summaries_by_role = {}
+        cached_timings = 0
+
+        # Ask every valid quick question concurrently, then report role by role
+        flat = [
+            (role, i, test["question"])
+            for role, questions in quick_question_tests.items()
+            if not role.startswith('_') and isinstance(questions, list)
+            for i, test in enumerate(questions, 1)
+            if isinstance(test, dict) and test.get("question")
+        ]
+        answers = asyncio.run(self._gather_questions([question for _, _, question in flat]))
+        answers_by_key = {(role, i): answer for (role, i, _), answer in zip(flat, answers)}
         
         for role, questions in quick_question_tests.items():
             # Skip metadata keys (e.g., _comment)
             if role.startswith('_'):
                 continue
             
-            print(f"\n{'='*60}")
-            print(f"🏷️  Testing Quick Questions for: {role.upper()}")
-            print(f"{'='*60}")
+            log.info(f"\n{_EQ60}")
+            log.info(f"🏷️  Testing Quick Questions for: {role.upper()}")
+            log.info(f"{_EQ60}")
             
             # Ensure questions is a list
             if not isinstance(questions, list):
-                print(f"⚠️ Questions for {role} is not a list (type: {type(questions)}), skipping...")
+                log.info(f"⚠️ Questions for {role} is not a list (type: {type(questions)}), skipping...")
                 continue
             
             if not questions:
-                print(f"⚠️ No questions for {role}")
+                log.info(f"⚠️ No questions for {role}")
                 continue
             
             response_times = []
@@ -381,136 +742,220 @@ class RentalPeaceEvaluator:
             for i, test in enumerate(questions, 1):
                 # Ensure test is a dictionary
                 if not isinstance(test, dict):
-                    print(f"\n💡 Quick Q{i}/{len(questions)}: Invalid type {type(test)}, skipping...")
+                    log.info(f"\n💡 Quick Q{i}/{len(questions)}: Invalid type {type(test)}, skipping...")
                     continue
                 
                 button_label = test.get("button_label", f"Button {i}")
                 question = test.get("question", "")
                 reference = test.get("reference_answer", "")
-                expected_keywords = test.get("expected_keywords", [])
+                expected_keywords = tuple(kw.lower() for kw in test.get("expected_keywords", []))
                 importance = test.get("importance", "medium")
                 
                 if not question:
-                    print(f"\n💡 Quick Q{i}/{len(questions)}: {button_label}")
-                    print(f"   ⚠️ No question provided, skipping...")
+                    log.info(f"\n💡 Quick Q{i}/{len(questions)}: {button_label}")
+                    log.info(f"   ⚠️ No question provided, skipping...")
                     continue
                 
-                print(f"\n💡 Quick Q{i}/{len(questions)}: {button_label}")
-                print(f"   Question: {question[:60]}...")
-                print(f"   Importance: {importance.upper()}")
+                log.info(f"\n💡 Quick Q{i}/{len(questions)}: {button_label}")
+                log.info(f"   Question: {question[:60]}...")
+                log.info(f"   Importance: {importance.upper()}")
                 
                 try:
                     # Test response time
-                    start_time = time.time()
-                    result = self.rag.ask_question(question, use_compression=False)
-                    response_time = time.time() - start_time
+                    timed = answers_by_key[(role, i)]
+                    if isinstance(timed, Exception):
+                        raise timed
+                    result, response_time = timed
                     response_times.append(response_time)
+                    cached = result.get("cached_timing", False)
+                    cached_timings += cached
                     
                     answer = result["answer"]
                     sources = result.get("sources", [])
                     
-                    print(f"   ⏱️  Response: {response_time:.2f}s")
-                    print(f"   📏 Answer: {len(answer)} chars")
+                    log.info(f"   ⏱️  Response: {response_time:.2f}s{' (cached)' if cached else ''}")
+                    log.info(f"   📏 Answer: {len(answer)} chars")
                     
                     # Check keywords
                     if expected_keywords:
                         answer_lower = answer.lower()
-                        keywords_found = sum(1 for kw in expected_keywords 
-                                        if kw.lower() in answer_lower)
+                        keywords_found = count_keywords(expected_keywords, answer_lower)
                         keyword_match_rate = keywords_found / len(expected_keywords)
                         keyword_matches.append(keyword_match_rate)
-                        print(f"   🔑 Keywords: {keywords_found}/{len(expected_keywords)} ({keyword_match_rate:.1%})")
+                        log.info(f"   🔑 Keywords: {keywords_found}/{len(expected_keywords)} ({keyword_match_rate:.1%})")
                     
                     # Calculate Faithfulness
                     if sources:
-                        source_content = " ".join([s.get("content", "") for s in sources])
-                        answer_words = set(answer.lower().split())
-                        source_words = set(source_content.lower().split())
+                        faithfulness = self._calculate_faithfulness(answer, sources)
                         
-                        stop_words = {"the", "a", "an", "is", "are", "was", "were", "in", "on", "at", "to", "for", "and", "or", "of", "by"}
-                        answer_words -= stop_words
-                        source_words -= stop_words
-                        
-                        if answer_words:
-                            faithfulness = len(answer_words & source_words) / len(answer_words)
+                        if faithfulness is not None:
                             faithfulness_scores.append(faithfulness)
-                            print(f"   ✅ Faithfulness: {faithfulness:.1%}")
+                            log.info(f"   ✅ Faithfulness: {faithfulness:.1%}")
 
                     # Calculate ROUGE
-                    if reference and ROUGE_AVAILABLE:
+                    if reference and self.rouge_scorer is not None:
                         scores = self.rouge_scorer.score(reference, answer)
                         rouge_scores_list.append(scores['rougeL'].fmeasure)
-                        print(f"   📊 ROUGE-L: {scores['rougeL'].fmeasure:.3f}")
+                        log.info(f"   📊 ROUGE-L: {scores['rougeL'].fmeasure:.3f}")
 
                     # Check response time
                     if response_time <= 2.0:
-                        print(f"   🚀 Fast response (≤2s)")
+                        log.info(f"   🚀 Fast response (≤2s)")
                     elif response_time <= 6.0:
-                        print(f"   ⚠️ Acceptable response (2-6s)")
+                        log.info(f"   ⚠️ Acceptable response (2-6s)")
                     else:
-                        print(f"   ❌ Slow response (>6s)")
+                        log.info(f"   ❌ Slow response (>6s)")
 
                 except Exception as e:
-                    print(f"   ❌ Error: {e}")
+                    log.warning(f"   ❌ Error: {e}")
                     response_times.append(0)
                     keyword_matches.append(0)
                     faithfulness_scores.append(0)
 
             # Summarize results for this role
             if response_times:
-                role_results = {
-                    "total_questions": len(questions),
-                    "avg_response_time": np.mean(response_times) if response_times else 0,
-                    "avg_keyword_match": np.mean(keyword_matches) if keyword_matches else 0,
-                    "avg_faithfulness": np.mean(faithfulness_scores) if faithfulness_scores else 0,
-                    "fast_response_rate": sum(1 for t in response_times if t <= 2.0) / len(response_times) if response_times else 0,
-                }
-                
-                if rouge_scores_list:
-                    role_results["avg_rougeL_f1"] = np.mean(rouge_scores_list)
+                role_summary = RoleSummary(
+                    total_questions=len(questions),
+                    avg_response_time=fmean(response_times) if response_times else 0,
+                    avg_keyword_match=fmean(keyword_matches) if keyword_matches else 0,
+                    avg_faithfulness=fmean(faithfulness_scores) if faithfulness_scores else 0,
+                    fast_response_rate=sum(1 for t in response_times if t <= 2.0) / len(response_times) if response_times else 0,
+                    avg_rougeL_f1=fmean(rouge_scores_list) if rouge_scores_list else None,
+                )
                 
-                results_by_role[role] = role_results
+                summaries_by_role[role] = role_summary
                 
-                print(f"\n{'-'*60}")
-                print(f"📊 {role.upper()} QUICK QUESTIONS SUMMARY:")
-                print(f"   Avg Response Time: {role_results['avg_response_time']:.2f}s")
-                print(f"   Fast Response Rate: {role_results['fast_response_rate']:.1%} (≤2s)")
-                print(f"   Keyword Match: {role_results['avg_keyword_match']:.1%}")
-                print(f"   Faithfulness: {role_results['avg_faithfulness']:.1%}")
-                if "avg_rougeL_f1" in role_results:
-                    print(f"   ROUGE-L: {role_results['avg_rougeL_f1']:.3f}")
-                print("-"*60)
+                log.info(f"\n{_DASH60}")
+                log.info(f"📊 {role.upper()} QUICK QUESTIONS SUMMARY:")
+                log.info(f"   Avg Response Time: {role_summary.avg_response_time:.2f}s")
+                log.info(f"   Fast Response Rate: {role_summary.fast_response_rate:.1%} (≤2s)")
+                log.info(f"   Keyword Match: {role_summary.avg_keyword_match:.1%}")
+                log.info(f"   Faithfulness: {role_summary.avg_faithfulness:.1%}")
+                if role_summary.avg_rougeL_f1 is not None:
+                    log.info(f"   ROUGE-L: {role_summary.avg_rougeL_f1:.3f}")
+                log.info(_DASH60)
 
         # Summarize overall results
         overall_results = {
-            "by_role": results_by_role,
-            "total_roles_tested": len(results_by_role),
+            "by_role": {role: summary.to_dict() for role, summary in summaries_by_role.items()},
+            "total_roles_tested": len(summaries_by_role),
+            # Response times (and the ≤2s fast rate) were measured with up to this many questions in flight
+            "concurrent_runs": True,
+            "max_concurrency": QUICK_QUESTION_MAX_WORKERS,
+            # Response times replayed from the disk cache (measured on an earlier run)
+            "cached_timings": cached_timings,
         }
 
         # Calculate overall averages
-        if results_by_role:
-            all_response_times = [r["avg_response_time"] for r in results_by_role.values()]
-            all_keyword_matches = [r["avg_keyword_match"] for r in results_by_role.values()]
-            all_faithfulness = [r["avg_faithfulness"] for r in results_by_role.values()]
+        if summaries_by_role:
+            all_response_times = [r.avg_response_time for r in summaries_by_role.values()]
+            all_keyword_matches = [r.avg_keyword_match for r in summaries_by_role.values()]
+            all_faithfulness = [r.avg_faithfulness for r in summaries_by_role.values()]
             
             overall_results.update({
-                "overall_avg_response_time": np.mean(all_response_times),
-                "overall_keyword_match": np.mean(all_keyword_matches),
-                "overall_faithfulness": np.mean(all_faithfulness),
+                "overall_avg_response_time": fmean(all_response_times),
+                "overall_keyword_match": fmean(all_keyword_matches),
+                "overall_faithfulness": fmean(all_faithfulness),
             })
         
-        print(f"\n{'='*60}")
-        print("📊 OVERALL QUICK QUESTIONS SUMMARY:")
+        log.info(f"\n{_EQ60}")
+        log.info("📊 OVERALL QUICK QUESTIONS SUMMARY:")
         if "overall_avg_response_time" in overall_results:
-            print(f"   Overall Avg Response: {overall_results['overall_avg_response_time']:.2f}s")
-            print(f"   Overall Keyword Match: {overall_results['overall_keyword_match']:.1%}")
-            print(f"   Overall Faithfulness: {overall_results['overall_faithfulness']:.1%}")
-        print(f"   Roles Tested: {overall_results['total_roles_tested']}")
-        print("="*60)
+            log.info(f"   Overall Avg Response: {overall_results['overall_avg_response_time']:.2f}s "
+                     f"(up to {QUICK_QUESTION_MAX_WORKERS} questions measured concurrently)")
+            log.info(f"   Overall Keyword Match: {overall_results['overall_keyword_match']:.1%}")
+            log.info(f"   Overall Faithfulness: {overall_results['overall_faithfulness']:.1%}")
+        log.info(f"   Roles Tested: {overall_results['total_roles_tested']}")
+        log.info(_EQ60)
         
         self.results["quick_questions_quality"] = overall_results
         return overall_results
     
+    def _prewarm_embeddings(self, questions: List[str]):
+        """Batch-embed questions so retrieval (and the query cache) reuse the vectors"""
+        prewarm = getattr(self.rag, "prewarm_query_embeddings", None)
+        if prewarm is None:
+            return
+        try:
+            prewarm(questions)
+        except Exception as e:
+            log.warning(f"   ⚠️ Embedding prewarm error: {e}")
+
+    def _timed_ask(self, question: str, use_compression: bool = False, use_memory: bool = True):
+        """
+        Ask a question and return (result, response_time), served from the disk cache when possible
+
+        Pass use_memory=False when questions run concurrently, so they do not
+        share (and race on) the RAG system's conversation memory. With memory,
+        the cache key covers the current conversation history and a cache hit
+        is written back to memory, so later questions see the same context as
+        in a cold run. A response time replayed from the cache was measured on
+        an earlier run; such results carry "cached_timing": True.
+        """
+        def ask():
+            start_time = time.time()
+            result = self.rag.ask_question(question, use_compression=use_compression, use_memory=use_memory)
+            return result, time.time() - start_time
+
+        history = self._memory_digest() if use_memory else ""
+        (result, response_time), from_cache = self._cached_call(
+            "ask", f"{question}|{use_compression}|{use_memory}|{history}", ask
+        )
+        if from_cache:
+            if use_memory:
+                self.rag.remember_exchange(question, result.get("answer", ""))
+            result = {**result, "cached_timing": True}
+        return result, response_time
+
+    def _memory_digest(self) -> str:
+        """Digest of the RAG system's conversation history (part of cache keys for memory-backed asks)"""
+        memory = getattr(self.rag, "memory", None)
+        messages = getattr(getattr(memory, "chat_memory", None), "messages", None) or []
+        text = "\x1e".join(f"{message.type}:{message.content}" for message in messages)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _cached_call(self, kind: str, query: str, compute):
+        """
+        Return (compute(), from_cache) through the disk cache
+
+        The key covers the model and the content of the loaded contracts,
+        so switching or editing either invalidates previous entries automatically.
+        """
+        if not self.use_cache:
+            return compute(), False
+
+        model_id = getattr(self.rag, "model", "")
+        fingerprint = getattr(self.rag, "_documents_fingerprint", None)
+        contracts = fingerprint() if fingerprint else ",".join(sorted(getattr(self.rag, "documents", {}) or {}))
+        key = hashlib.sha256(f"{kind}|{model_id}|{contracts}|{query}".encode()).hexdigest()
+        cache_path = self.cache_dir / f"{key}.pkl"
+
+        if cache_path.exists():
+            try:
+                with open(cache_path, 'rb') as f:
+                    return pickle.load(f), True
+            except Exception:
+                pass
+
+        value = compute()
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}_{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f)
+        os.replace(tmp_path, cache_path)
+        return value, False
+
+    async def _gather_questions(self, questions: List[str]) -> List:
+        """
+        Run _timed_ask for all questions concurrently (exceptions are returned, not raised)
+
+        At most QUICK_QUESTION_MAX_WORKERS run at once, each without conversation memory.
+        """
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=QUICK_QUESTION_MAX_WORKERS) as executor:
+            tasks = [loop.run_in_executor(executor, partial(self._timed_ask, question, use_memory=False))
+                     for question in questions]
+            return await asyncio.gather(*tasks, return_exceptions=True)
+    
     # ========================================
     # 4. Citation Quality Evaluation
     # ========================================
@@ -532,12 +977,12 @@ class RentalPeaceEvaluator:
         Returns:
             Citation quality metrics
         """
-        print("\n" + "="*60)
-        print("📚 4. SOURCE CITATION QUALITY EVALUATION")
-        print("="*60)
+        log.info("\n" + _EQ60)
+        log.info("📚 4. SOURCE CITATION QUALITY EVALUATION")
+        log.info(_EQ60)
         
         if not citation_tests:
-            print("⚠️ No citation tests provided")
+            log.info("⚠️ No citation tests provided")
             return {}
         
         accuracy_scores = []
@@ -548,34 +993,32 @@ class RentalPeaceEvaluator:
             expected_pages = set(test.get("expected_source_pages", []))
             critical_pages = set(test.get("critical_pages", []))
             
-            print(f"\n📝 Test {i}/{len(citation_tests)}: {question[:60]}...")
+            log.info(f"\n📝 Test {i}/{len(citation_tests)}: {question[:60]}...")
             
             try:
-                result = self.rag.ask_question(question)
+                result, _ = self._timed_ask(question)
                 sources = result.get("sources", [])
                 
                 if not sources:
-                    print(f"   ⚠️ No sources returned")
+                    log.info(f"   ⚠️ No sources returned")
                     accuracy_scores.append(0)
                     completeness_scores.append(0)
                     continue
 
                 # Extract returned pages
-                returned_pages = set()
-                for source in sources:
-                    page = source.get("page")
-                    if page is not None and isinstance(page, int):
-                        returned_pages.add(page)
+                returned_pages = {page for source in sources
+                                  if isinstance(page := source.get("page"), int)}
                 
-                print(f"   📄 Returned: {sorted(returned_pages)}")
-                print(f"   🎯 Expected: {sorted(expected_pages)}")
+                if self.verbose:
+                    log.info(f"   📄 Returned: {sorted(returned_pages)}")
+                    log.info(f"   🎯 Expected: {sorted(expected_pages)}")
 
                 # 1. Citation Accuracy
                 if returned_pages:
                     correct_pages = returned_pages & expected_pages
                     accuracy = len(correct_pages) / len(returned_pages)
                     accuracy_scores.append(accuracy)
-                    print(f"   ✅ Accuracy: {accuracy:.1%} ({len(correct_pages)}/{len(returned_pages)})")
+                    log.info(f"   ✅ Accuracy: {accuracy:.1%} ({len(correct_pages)}/{len(returned_pages)})")
                 else:
                     accuracy_scores.append(0)
 
@@ -584,19 +1027,19 @@ class RentalPeaceEvaluator:
                     found_critical = returned_pages & critical_pages
                     completeness = len(found_critical) / len(critical_pages)
                     completeness_scores.append(completeness)
-                    print(f"   📊 Completeness: {completeness:.1%} ({len(found_critical)}/{len(critical_pages)})")
+                    log.info(f"   📊 Completeness: {completeness:.1%} ({len(found_critical)}/{len(critical_pages)})")
                 else:
                     completeness_scores.append(1.0)
                 
             except Exception as e:
-                print(f"   ❌ Error: {e}")
+                log.warning(f"   ❌ Error: {e}")
                 accuracy_scores.append(0)
                 completeness_scores.append(0)
 
         # Summarize results
         results = {
-            "source_accuracy": np.mean(accuracy_scores) if accuracy_scores else 0,
-            "source_completeness": np.mean(completeness_scores) if completeness_scores else 0,
+            "source_accuracy": fmean(accuracy_scores) if accuracy_scores else 0,
+            "source_completeness": fmean(completeness_scores) if completeness_scores else 0,
             "total_tests": len(citation_tests)
         }
         
@@ -607,12 +1050,12 @@ class RentalPeaceEvaluator:
         
         results["source_citation_score"] = source_score
         
-        print("\n" + "-"*60)
-        print("📊 SOURCE CITATION SUMMARY:")
-        print(f"   Accuracy: {results['source_accuracy']:.1%}")
-        print(f"   Completeness: {results['source_completeness']:.1%}")
-        print(f"   Overall Score: {source_score:.1f}/100")
-        print("-"*60)
+        log.info("\n" + _DASH60)
+        log.info("📊 SOURCE CITATION SUMMARY:")
+        log.info(f"   Accuracy: {results['source_accuracy']:.1%}")
+        log.info(f"   Completeness: {results['source_completeness']:.1%}")
+        log.info(f"   Overall Score: {source_score:.1f}/100")
+        log.info(_DASH60)
         
         self.results["source_citation"] = results
         return results
@@ -640,12 +1083,12 @@ class RentalPeaceEvaluator:
         Returns:
             Summary quality metrics
         """
-        print("\n" + "="*60)
-        print("📝 5. SUMMARY QUALITY EVALUATION")
-        print("="*60)
+        log.info("\n" + _EQ60)
+        log.info("📝 5. SUMMARY QUALITY EVALUATION")
+        log.info(_EQ60)
         
         if not summary_tests:
-            print("⚠️ No summary tests provided")
+            log.info("⚠️ No summary tests provided")
             return {}
         
         keyword_coverage_scores = []
@@ -655,12 +1098,12 @@ class RentalPeaceEvaluator:
         
         for i, test in enumerate(summary_tests, 1):
             summary_type = test.get("summary_type", "brief")
-            required_keywords = test.get("required_keywords", [])
+            required_keywords = tuple(kw.lower() for kw in test.get("required_keywords", []))
             min_length = test.get("min_length", 0)
             max_length = test.get("max_length", float('inf'))
             reference_summary = test.get("reference_summary", "")
             
-            print(f"\n📋 Summary Test {i}/{len(summary_tests)}: Type={summary_type}")
+            log.info(f"\n📋 Summary Test {i}/{len(summary_tests)}: Type={summary_type}")
             
             try:
                 start_time = time.time()
@@ -670,55 +1113,55 @@ class RentalPeaceEvaluator:
                 
                 summary_length = len(generated_summary)
                 
-                print(f"   ⏱️  {generation_time:.2f}s | 📏 {summary_length} chars")
+                log.info(f"   ⏱️  {generation_time:.2f}s | 📏 {summary_length} chars")
                 
                 # Check length
                 length_valid = min_length <= summary_length <= max_length
                 length_compliance_scores.append(1.0 if length_valid else 0.5)
                 
                 if length_valid:
-                    print(f"   ✅ Length OK ({min_length}-{max_length})")
+                    log.info(f"   ✅ Length OK ({min_length}-{max_length})")
                 else:
-                    print(f"   ⚠️ Length: {summary_length} (expected {min_length}-{max_length})")
+                    log.info(f"   ⚠️ Length: {summary_length} (expected {min_length}-{max_length})")
                 
                 # Check keywords
-                keywords_found = sum(1 for kw in required_keywords 
-                                    if kw.lower() in generated_summary.lower())
+                summary_lower = generated_summary.lower()
+                keywords_found = count_keywords(required_keywords, summary_lower)
                 keyword_coverage = keywords_found / len(required_keywords) if required_keywords else 1.0
                 keyword_coverage_scores.append(keyword_coverage)
                 
-                print(f"   📌 Keywords: {keywords_found}/{len(required_keywords)} ({keyword_coverage:.1%})")
+                log.info(f"   📌 Keywords: {keywords_found}/{len(required_keywords)} ({keyword_coverage:.1%})")
                 
                 # Calculate ROUGE
-                if reference_summary and ROUGE_AVAILABLE:
+                if reference_summary and self.rouge_scorer is not None:
                     scores = self.rouge_scorer.score(reference_summary, generated_summary)
                     rouge_scores_all["rouge1"].append(scores['rouge1'].fmeasure)
                     rouge_scores_all["rougeL"].append(scores['rougeL'].fmeasure)
-                    print(f"   📊 ROUGE-L: {scores['rougeL'].fmeasure:.3f}")
+                    log.info(f"   📊 ROUGE-L: {scores['rougeL'].fmeasure:.3f}")
                 
             except Exception as e:
-                print(f"   ⚠️ Error: {e}")
+                log.warning(f"   ⚠️ Error: {e}")
 
         # Summarize results
         results = {
             "total_tests": len(summary_tests),
-            "avg_keyword_coverage": np.mean(keyword_coverage_scores) if keyword_coverage_scores else 0,
-            "length_compliance_rate": np.mean(length_compliance_scores) if length_compliance_scores else 0,
-            "avg_generation_time": np.mean(generation_times) if generation_times else 0
+            "avg_keyword_coverage": fmean(keyword_coverage_scores) if keyword_coverage_scores else 0,
+            "length_compliance_rate": fmean(length_compliance_scores) if length_compliance_scores else 0,
+            "avg_generation_time": fmean(generation_times) if generation_times else 0
         }
         
         if rouge_scores_all["rouge1"]:
-            results["avg_rouge1_f1"] = np.mean(rouge_scores_all["rouge1"])
-            results["avg_rougeL_f1"] = np.mean(rouge_scores_all["rougeL"])
-        
-        print("\n" + "-"*60)
-        print("📊 SUMMARY QUALITY SUMMARY:")
-        print(f"   Keyword Coverage: {results['avg_keyword_coverage']:.1%}")
-        print(f"   Length Compliance: {results['length_compliance_rate']:.1%}")
-        print(f"   Avg Generation Time: {results['avg_generation_time']:.2f}s")
+            results["avg_rouge1_f1"] = fmean(rouge_scores_all["rouge1"])
+            results["avg_rougeL_f1"] = fmean(rouge_scores_all["rougeL"])
+        
+        log.info("\n" + _DASH60)
+        log.info("📊 SUMMARY QUALITY SUMMARY:")
+        log.info(f"   Keyword Coverage: {results['avg_keyword_coverage']:.1%}")
+        log.info(f"   Length Compliance: {results['length_compliance_rate']:.1%}")
+        log.info(f"   Avg Generation Time: {results['avg_generation_time']:.2f}s")
         if "avg_rougeL_f1" in results:
-            print(f"   Avg ROUGE-L: {results['avg_rougeL_f1']:.3f}")
-        print("-"*60)
+            log.info(f"   Avg ROUGE-L: {results['avg_rougeL_f1']:.3f}")
+        log.info(_DASH60)
         
         self.results["summary_quality"] = results
         return results
@@ -742,101 +1185,122 @@ class RentalPeaceEvaluator:
         Returns:
             Extraction accuracy metrics
         """
-        print("\n" + "="*60)
-        print("🔍 6. INFORMATION EXTRACTION ACCURACY")
-        print("="*60)
+        log.info("\n" + _EQ60)
+        log.info("🔍 6. INFORMATION EXTRACTION ACCURACY")
+        log.info(_EQ60)
         
         if not ground_truth:
-            print("⚠️ No ground truth provided")
+            log.info("⚠️ No ground truth provided")
             return {}
         
         try:
             start_time = time.time()
             extracted = self.rag.extract_key_information()
             extraction_time = time.time() - start_time
+            # Reused results from an earlier run on the same contract are not a latency sample
+            cache_hit = getattr(self.rag, "last_extraction_cache_hit", False)
+            if cache_hit:
+                extraction_time = 0.0
+                log.info("\n♻️  Extraction served from cache")
+            else:
+                log.info(f"\n⏱️  Extraction time: {extraction_time:.2f}s")
+            log.info(f"📊 Fields: {len(extracted)}")
             
-            print(f"\n⏱️  Extraction time: {extraction_time:.2f}s")
-            print(f"📊 Fields: {len(extracted)}")
-            
-            correct = 0
-            partial = 0
-            missing = 0
+            import numpy as np
+
             total = len(ground_truth)
+            fields = list(ground_truth)
+            expected_values = [ground_truth[field] for field in fields]
+            extracted_values = [extracted.get(field, "") for field in fields]
             
-            field_results = {}
-            
-            for field, true_value in ground_truth.items():
-                extracted_value = extracted.get(field, "")
-                
+            if not extracted or "error" in extracted:
+                # Nothing extracted: every field is a miss, skip normalization and matching
+                statuses = np.full(total, "❌ MISS")
+                scores = np.zeros(total)
+                correct = partial = 0
+            else:
                 # Normalize for comparison
-                true_value_norm = self._normalize_for_comparison(true_value)
-                extracted_value_norm = self._normalize_for_comparison(extracted_value)
-                
-                # Exact match
-                if true_value_norm == extracted_value_norm:
-                    correct += 1
-                    match_status = "✅ EXACT"
-                    score = 1.0
-                # Partial match
-                elif true_value_norm in extracted_value_norm or extracted_value_norm in true_value_norm:
-                    partial += 1
-                    match_status = "⚠️ PARTIAL"
-                    score = 0.5
-                # Fuzzy match (numerical)
-                elif self._fuzzy_match(true_value_norm, extracted_value_norm):
-                    partial += 1
-                    match_status = "⚠️ FUZZY"
-                    score = 0.7
-                else:
-                    missing += 1
-                    match_status = "❌ MISS"
-                    score = 0.0
+                true_norm = np.array([self._normalize_for_comparison(v) for v in expected_values], dtype=object)
+                ext_norm = np.array([self._normalize_for_comparison(v) for v in extracted_values], dtype=object)
                 
-                field_results[field] = {
-                    "expected": true_value,
-                    "extracted": extracted_value,
-                    "status": match_status,
-                    "score": score
-                }
+                # Classify every field at once: exact > partial (substring) > fuzzy (numerical) > miss
+                exact_mask = true_norm == ext_norm
+                partial_mask = ~exact_mask & np.fromiter(
+                    (_is_partial_match(t, e) for t, e in zip(true_norm, ext_norm)), dtype=bool, count=total
+                )
+                fuzzy_mask = ~exact_mask & ~partial_mask & np.fromiter(
+                    (self._fuzzy_match(t, e) for t, e in zip(true_norm, ext_norm)), dtype=bool, count=total
+                )
+                # Near misses the checks above cannot see (typos, reordered words), when rapidfuzz is installed
+                similar_mask = np.zeros(total, dtype=bool)
+                if RAPIDFUZZ_AVAILABLE:
+                    similar_mask = ~exact_mask & ~partial_mask & ~fuzzy_mask & np.fromiter(
+                        (_is_similar(t, e) for t, e in zip(true_norm, ext_norm)), dtype=bool, count=total
+                    )
+                masks = [exact_mask, partial_mask, fuzzy_mask, similar_mask]
+                statuses = np.select(masks, ["✅ EXACT", "⚠️ PARTIAL", "⚠️ FUZZY", "⚠️ SIMILAR"], default="❌ MISS")
+                scores = np.select(masks, [1.0, 0.5, 0.7, 0.6], default=0.0)
                 
-                print(f"\n📌 {field}:")
-                print(f"   Expected:  {true_value}")
-                print(f"   Extracted: {extracted_value}")
-                print(f"   {match_status}")
+                correct = int(exact_mask.sum())
+                partial = int((partial_mask | fuzzy_mask | similar_mask).sum())
+            missing = total - correct - partial
+            
+            field_results = {
+                field: FieldResult(
+                    expected=expected_values[k],
+                    extracted=extracted_values[k],
+                    status=str(statuses[k]),
+                    score=float(scores[k])
+                )
+                for k, field in enumerate(fields)
+            }
+            
+            if self.verbose:
+                # One write for all fields instead of four per field
+                log.info("".join(
+                    f"\n📌 {field}:\n"
+                    f"   Expected:  {details.expected}\n"
+                    f"   Extracted: {details.extracted}\n"
+                    f"   {details.status}"
+                    for field, details in field_results.items()
+                ))
 
             # Calculate metrics
             precision = (correct + 0.5 * partial) / total if total > 0 else 0
             recall = (correct + 0.5 * partial) / total if total > 0 else 0
             f1_score = 2 * (precision * recall) / (precision + recall) if (precision + recall) > 0 else 0
             
-            results = {
-                "exact_match_rate": correct / total if total > 0 else 0,
-                "partial_match_rate": partial / total if total > 0 else 0,
-                "miss_rate": missing / total if total > 0 else 0,
-                "f1_score": f1_score,
-                "precision": precision,
-                "recall": recall,
-                "correct_fields": correct,
-                "partial_fields": partial,
-                "missing_fields": missing,
-                "total_fields": total,
-                "extraction_time": extraction_time,
-                "field_details": field_results
-            }
+            extraction = ExtractionResult(
+                exact_match_rate=correct / total if total > 0 else 0,
+                partial_match_rate=partial / total if total > 0 else 0,
+                miss_rate=missing / total if total > 0 else 0,
+                f1_score=f1_score,
+                precision=precision,
+                recall=recall,
+                correct_fields=correct,
+                partial_fields=partial,
+                missing_fields=missing,
+                total_fields=total,
+                extraction_time=extraction_time,
+                cache_hit=cache_hit,
+                similarity_matching=RAPIDFUZZ_AVAILABLE,
+                field_details=field_results,
+            )
             
-            print("\n" + "-"*60)
-            print("📊 EXTRACTION SUMMARY:")
-            print(f"   Exact Match: {results['exact_match_rate']:.1%} ({correct}/{total})")
-            print(f"   Partial Match: {results['partial_match_rate']:.1%} ({partial}/{total})")
-            print(f"   F1 Score: {results['f1_score']:.3f}")
-            print(f"   Extraction Time: {extraction_time:.2f}s")
-            print("-"*60)
+            log.info("\n" + _DASH60)
+            log.info("📊 EXTRACTION SUMMARY:")
+            log.info(f"   Exact Match: {extraction.exact_match_rate:.1%} ({correct}/{total})")
+            log.info(f"   Partial Match: {extraction.partial_match_rate:.1%} ({partial}/{total})")
+            log.info(f"   F1 Score: {extraction.f1_score:.3f}")
+            log.info(f"   Extraction Time: {extraction_time:.2f}s")
+            log.info(_DASH60)
             
+            results = extraction.to_dict()
             self.results["extraction_accuracy"] = results
             return results
             
         except Exception as e:
-            print(f"⚠️ Extraction error: {e}")
+            log.warning(f"⚠️ Extraction error: {e}")
             return {}
     
     def _normalize_for_comparison(self, text: str) -> str:
@@ -844,88 +1308,148 @@ class RentalPeaceEvaluator:
         if not isinstance(text, str):
             text = str(text)
 
-        # Apply the same normalization as the RAG system
-        text = text.lower().strip()
-
-        # Handle dollar sign
-        text = text.replace('$', 's$')
-
-        # Unicode normalization
-        import unicodedata
-        text = unicodedata.normalize('NFKD', text)
-
-        # Remove extra spaces
-        text = ' '.join(text.split())
-        
-        return text
+        return _normalize_for_comparison(text)
     
     def _fuzzy_match(self, str1: str, str2: str) -> bool:
         """Fuzzy match (numerical)"""
-        import re
-        nums1 = re.findall(r'\d+', str1)
-        nums2 = re.findall(r'\d+', str2)
-        return len(nums1) > 0 and nums1 == nums2
+        nums1 = _DIGIT_RE.findall(str1)
+        nums2 = _DIGIT_RE.findall(str2)
+        return bool(nums1) and nums1 == nums2
     
     # ========================================
     # 7. Efficiency Evaluation
     # ========================================
     
-    def evaluate_efficiency(self, questions: List[str], runs: int = 3) -> Dict:
+    def evaluate_efficiency(self, questions: List[str], runs: int = 3,
+                            use_query_cache: bool = True, sequential: bool = False) -> Dict:
         """
         Evaluate system efficiency
         
         Args:
             questions: List of test questions
             runs: Number of repetitions for each question
+            use_query_cache: Serve runs 2..N from an exact/semantic answer cache.
+                Run 1 always reaches the RAG system and is reported as cold
+                latency; the rest are reported as warm latency.
+                Set False to time every run against the RAG system.
+            sequential: Time uncached runs one after another. By default they
+                are dispatched concurrently, so latencies reflect overlapping
+                requests rather than single-stream throughput.
 
         Returns:
             System efficiency metrics
         """
 
-        print("\n" + "="*60)
-        print("⚡ 7. SYSTEM EFFICIENCY EVALUATION")
-        print("="*60)
+        log.info("\n" + _EQ60)
+        log.info("⚡ 7. SYSTEM EFFICIENCY EVALUATION")
+        log.info(_EQ60)
         
         if not questions:
-            print("⚠️ No questions provided")
+            log.info("⚠️ No questions provided")
             return {}
         
-        response_times = []
+        import numpy as np
+
+        runs = max(1, runs)
+        # One row per question, one column per run; failed runs stay NaN
+        timings = np.full((len(questions), runs), np.nan)
+        query_cache = _QueryCache() if use_query_cache else None
+        # Warm runs are cache hits, so only uncached sweeps benefit from overlapping requests
+        concurrent_runs = not sequential and query_cache is None and runs > 1
+
+        # One batched embedding request for all questions instead of one per question
+        self._prewarm_embeddings(questions)
         
         for i, question in enumerate(questions, 1):
-            print(f"\n📝 Q{i}/{len(questions)}: {question[:50]}...")
+            log.info(f"\n📝 Q{i}/{len(questions)}: {question[:50]}...")
+
+            # Embed once per question for semantic cache lookups
+            query_vec = None
+            if query_cache is not None:
+                try:
+                    query_vec = self.rag.embeddings.embed_query(question)
+                except Exception:
+                    query_vec = None
             
-            question_times = []
-            for run in range(runs):
+            # The first successful run always goes to the RAG system, so a similar earlier
+            # question's cache entry can never be reported as this question's cold latency
+            cold_pending = True
+
+            def timed_run(_run):
+                nonlocal cold_pending
                 try:
                     start_time = time.time()
-                    self.rag.ask_question(question)
-                    elapsed = time.time() - start_time
-                    question_times.append(elapsed)
+                    response = None
+                    if query_cache is not None and not cold_pending:
+                        response = query_cache.get(question, query_vec)
+                    if response is None:
+                        # Runs may overlap, so none of them reads or writes the shared conversation memory
+                        response = self.rag.ask_question(question, use_memory=False)
+                        cold_pending = False
+                        if query_cache is not None:
+                            query_cache.put(question, response, query_vec)
+                    return time.time() - start_time
                 except Exception as e:
-                    print(f"   ⚠️ Run {run+1} error: {e}")
+                    log.warning(f"   ⚠️ Run {_run+1} error: {e}")
+                    return None
+
+            if concurrent_runs:
+                with ThreadPoolExecutor(max_workers=min(runs, 8)) as executor:
+                    run_times = list(executor.map(timed_run, range(runs)))
+            else:
+                run_times = [timed_run(run) for run in range(runs)]
+            row = timings[i - 1]
+            row[:] = [np.nan if t is None else t for t in run_times]
+            question_times = row[~np.isnan(row)]
             
-            if question_times:
-                avg_time = np.mean(question_times)
-                response_times.append(avg_time)
-                print(f"   ⏱️  Avg: {avg_time:.2f}s (over {runs} runs)")
-        
-        results = {
-            "avg_response_time": np.mean(response_times) if response_times else 0,
-            "min_response_time": np.min(response_times) if response_times else 0,
-            "max_response_time": np.max(response_times) if response_times else 0,
-            "std_response_time": np.std(response_times) if response_times else 0,
-            "total_questions": len(questions),
-            "runs_per_question": runs
-        }
+            if question_times.size:
+                if query_cache is not None:
+                    log.info(f"   ⏱️  Cold: {question_times[0]:.2f}s | Warm: "
+                             f"{question_times[1:].mean() if question_times.size > 1 else 0:.4f}s")
+                else:
+                    log.info(f"   ⏱️  Avg: {question_times.mean():.2f}s (over {runs} runs)")
+        
+        succeeded = ~np.isnan(timings)
+        answered = succeeded.any(axis=1)
+        if query_cache is not None:
+            # Only the first successful run hits the RAG system; it is the real latency
+            first_run = succeeded.argmax(axis=1)
+            cold_times = timings[np.arange(len(questions)), first_run][answered]
+            warm_times = timings[succeeded & (np.arange(runs) > first_run[:, None])]
+            response_times = cold_times
+        else:
+            response_times = np.nanmean(timings[answered], axis=1)
+        
+        # A handful of timings: one streaming pass beats numpy's per-call overhead here
+        avg_time, min_time, max_time, std_time = _timing_stats(map(float, response_times))
+
+        efficiency = EfficiencyResult(
+            avg_response_time=avg_time,
+            min_response_time=min_time,
+            max_response_time=max_time,
+            std_response_time=std_time,
+            total_questions=len(questions),
+            runs_per_question=runs,
+            query_cache=use_query_cache,
+            concurrent_runs=concurrent_runs,
+            avg_cold_response_time=None,
+            avg_warm_response_time=None,
+        )
+
+        if query_cache is not None:
+            efficiency.avg_cold_response_time = float(cold_times.mean()) if cold_times.size else 0
+            efficiency.avg_warm_response_time = float(warm_times.mean()) if warm_times.size else 0
         
-        print("\n" + "-"*60)
-        print("📊 EFFICIENCY SUMMARY:")
-        print(f"   Avg Response: {results['avg_response_time']:.2f}s")
-        print(f"   Min/Max: {results['min_response_time']:.2f}s / {results['max_response_time']:.2f}s")
-        print(f"   Std Dev: {results['std_response_time']:.2f}s")
-        print("-"*60)
+        log.info("\n" + _DASH60)
+        log.info("📊 EFFICIENCY SUMMARY:")
+        log.info(f"   Avg Response: {efficiency.avg_response_time:.2f}s")
+        log.info(f"   Min/Max: {efficiency.min_response_time:.2f}s / {efficiency.max_response_time:.2f}s")
+        log.info(f"   Std Dev: {efficiency.std_response_time:.2f}s")
+        if query_cache is not None:
+            log.info(f"   Cold/Warm: {efficiency.avg_cold_response_time:.2f}s / {efficiency.avg_warm_response_time:.4f}s")
+        log.info(_DASH60)
         
+        results = efficiency.to_dict()
         self.results["efficiency"] = results
         return results
     
@@ -933,42 +1457,57 @@ class RentalPeaceEvaluator:
     # Full Evaluation Runner
     # ========================================
     
-    def run_full_evaluation(self, test_data: Dict) -> Dict:
-        """Run full evaluation"""
-        print("\n" + "="*80)
-        print(" "*20 + "🚀 RENTALPEACE CHATBOT EVALUATION")
-        print(" "*25 + f"Mode: {self.evaluation_mode.upper()}")
-        print(" "*22 + f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("="*80)
+    def run_full_evaluation(self, test_data: Dict, parallel: bool = False) -> Dict:
+        """
+        Run full evaluation
+
+        Args:
+            test_data: Test data loaded from the test data JSON file
+            parallel: Run retrieval and summary evaluation alongside the
+                question-based evaluations instead of one after another.
+                Answer quality, quick questions, source citation and extraction
+                share the RAG conversation memory, so they stay in order on a
+                single worker; efficiency always runs last on its own so its
+                latencies are not measured under load. Section logs interleave.
+        """
+        log.info("\n" + _EQ80)
+        log.info(" "*20 + "🚀 RENTALPEACE CHATBOT EVALUATION")
+        log.info(" "*25 + f"Mode: {self.evaluation_mode.upper()}")
+        log.info(" "*22 + f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        log.info(_EQ80)
         
         start_time = time.time()
-        
-        # 1. Retrieval Quality
-        if "retrieval_tests" in test_data and test_data["retrieval_tests"]:
-            self.evaluate_retrieval_quality(test_data["retrieval_tests"])
-        
-        # 2. Answer Quality
-        if "qa_pairs" in test_data and test_data["qa_pairs"]:
-            self.evaluate_answer_quality(test_data["qa_pairs"])
-        
-        # 3. Quick Question Buttons Quality
-        if "quick_questions" in test_data and test_data["quick_questions"]:
-            self.evaluate_quick_questions(test_data["quick_questions"])
-        
-        # 4. Source Citation
-        if "source_citation_tests" in test_data and test_data["source_citation_tests"]:
-            self.evaluate_source_citation(test_data["source_citation_tests"])
-        
-        # 5. Summary Quality
-        if "summary_tests" in test_data and test_data["summary_tests"]:
-            self.evaluate_summary_quality(test_data["summary_tests"])
-        
-        # 6. Information Extraction
-        if "extraction_ground_truth" in test_data and test_data["extraction_ground_truth"]:
-            self.evaluate_extraction_accuracy(test_data["extraction_ground_truth"])
+
+        # (test data key, evaluator) in report order; only sections with data are run
+        sections = [
+            ("retrieval_tests", self.evaluate_retrieval_quality),         # 1. Retrieval Quality
+            ("qa_pairs", self.evaluate_answer_quality),                    # 2. Answer Quality
+            ("quick_questions", self.evaluate_quick_questions),           # 3. Quick Question Buttons Quality
+            ("source_citation_tests", self.evaluate_source_citation),     # 4. Source Citation
+            ("summary_tests", self.evaluate_summary_quality),             # 5. Summary Quality
+            ("extraction_ground_truth", self.evaluate_extraction_accuracy),  # 6. Information Extraction
+        ]
+        sections = [(key, evaluate) for key, evaluate in sections if test_data.get(key)]
+
+        if parallel and len(sections) > 1:
+            independent = [(k, f) for k, f in sections if k in ("retrieval_tests", "summary_tests")]
+            conversational = [(k, f) for k, f in sections if k not in ("retrieval_tests", "summary_tests")]
+
+            def run_in_order(group):
+                for key, evaluate in group:
+                    evaluate(test_data[key])
+
+            with ThreadPoolExecutor(max_workers=len(independent) + 1) as executor:
+                futures = [executor.submit(run_in_order, [section]) for section in independent]
+                futures.append(executor.submit(run_in_order, conversational))
+                for future in futures:
+                    future.result()
+        else:
+            for key, evaluate in sections:
+                evaluate(test_data[key])
         
         # 7. Efficiency
-        if "efficiency_questions" in test_data and test_data["efficiency_questions"]:
+        if test_data.get("efficiency_questions"):
             self.evaluate_efficiency(test_data["efficiency_questions"])
         
         total_time = time.time() - start_time
@@ -984,16 +1523,6 @@ class RentalPeaceEvaluator:
     
     def _calculate_overall_score(self):
         """Calculate overall score"""
-        weights = {
-            "retrieval_quality": 0.20,
-            "answer_quality": 0.25,
-            "quick_questions_quality": 0.15,  
-            "source_citation": 0.12,
-            "summary_quality": 0.12,
-            "extraction_accuracy": 0.10,
-            "efficiency": 0.06
-        }
-        
         dimension_scores = {}
         
         # Retrieval Quality
@@ -1045,10 +1574,10 @@ class RentalPeaceEvaluator:
         total_score = 0
         total_weight = 0
         
-        for dimension, score in dimension_scores.items():
-            weight = weights.get(dimension, 0)
-            total_score += score * weight
-            total_weight += weight
+        for dimension, weight in _DIM_WEIGHTS:
+            if dimension in dimension_scores:
+                total_score += dimension_scores[dimension] * weight
+                total_weight += weight
         
         overall_score = total_score / total_weight if total_weight > 0 else 0
         
@@ -1057,70 +1586,74 @@ class RentalPeaceEvaluator:
     
     def print_summary(self, total_time: float = 0):
         """Print evaluation summary"""
-        print("\n\n" + "="*80)
-        print(" "*30 + "📊 EVALUATION SUMMARY")
-        print("="*80)
+        # Collect the whole report and emit it in one write
+        lines = []
+        out = lines.append
+        out("\n\n" + _EQ80)
+        out(" "*30 + "📊 EVALUATION SUMMARY")
+        out(_EQ80)
 
         # Retrieval Quality
         if self.results.get("retrieval_quality"):
             r = self.results["retrieval_quality"]
-            print(f"\n🎯 Retrieval Quality:")
-            print(f"   • MRR: {r.get('mrr', 0):.3f}")
-            print(f"   • Recall@5: {r.get('recall@5', 0):.1%}")
+            out(f"\n🎯 Retrieval Quality:")
+            out(f"   • MRR: {r.get('mrr', 0):.3f}")
+            out(f"   • Recall@5: {r.get('recall@5', 0):.1%}")
 
         # Answer Quality
         if self.results.get("answer_quality"):
             a = self.results["answer_quality"]
-            print(f"\n💬 Answer Quality:")
-            print(f"   • Faithfulness: {a.get('avg_faithfulness', 0):.1%}")
+            out(f"\n💬 Answer Quality:")
+            out(f"   • Faithfulness: {a.get('avg_faithfulness', 0):.1%}")
             if a.get('rougeL_f1'):
-                print(f"   • ROUGE-L: {a.get('rougeL_f1', 0):.3f}")
+                out(f"   • ROUGE-L: {a.get('rougeL_f1', 0):.3f}")
 
         # Quick Questions Quality
         if self.results.get("quick_questions_quality"):
             q = self.results["quick_questions_quality"]
-            print(f"\n💡 Quick Questions Quality:")
+            out(f"\n💡 Quick Questions Quality:")
             if "overall_avg_response_time" in q:
-                print(f"   • Avg Response: {q['overall_avg_response_time']:.2f}s")
-                print(f"   • Keyword Match: {q['overall_keyword_match']:.1%}")
-                print(f"   • Faithfulness: {q['overall_faithfulness']:.1%}")
+                concurrency = f" (measured {q['max_concurrency']} at a time)" if q.get("concurrent_runs") else ""
+                out(f"   • Avg Response: {q['overall_avg_response_time']:.2f}s{concurrency}")
+                out(f"   • Keyword Match: {q['overall_keyword_match']:.1%}")
+                out(f"   • Faithfulness: {q['overall_faithfulness']:.1%}")
             
             if "by_role" in q:
                 for role, stats in q["by_role"].items():
-                    print(f"   • {role.capitalize()}: {stats['avg_response_time']:.2f}s avg")
+                    out(f"   • {role.capitalize()}: {stats['avg_response_time']:.2f}s avg")
 
         # Source Citation
         if self.results.get("source_citation"):
             sc = self.results["source_citation"]
-            print(f"\n📚 Source Citation:")
-            print(f"   • Accuracy: {sc.get('source_accuracy', 0):.1%}")
-            print(f"   • Score: {sc.get('source_citation_score', 0):.1f}/100")
+            out(f"\n📚 Source Citation:")
+            out(f"   • Accuracy: {sc.get('source_accuracy', 0):.1%}")
+            out(f"   • Score: {sc.get('source_citation_score', 0):.1f}/100")
 
         # Summary Quality
         if self.results.get("summary_quality"):
             s = self.results["summary_quality"]
-            print(f"\n📝 Summary Quality:")
-            print(f"   • Keyword Coverage: {s.get('avg_keyword_coverage', 0):.1%}")
-            print(f"   • Generation Time: {s.get('avg_generation_time', 0):.2f}s")
+            out(f"\n📝 Summary Quality:")
+            out(f"   • Keyword Coverage: {s.get('avg_keyword_coverage', 0):.1%}")
+            out(f"   • Generation Time: {s.get('avg_generation_time', 0):.2f}s")
 
         # Information Extraction
         if self.results.get("extraction_accuracy"):
             ex = self.results["extraction_accuracy"]
-            print(f"\n🔍 Extraction Accuracy:")
-            print(f"   • F1 Score: {ex.get('f1_score', 0):.3f}")
-            print(f"   • Exact Match: {ex.get('exact_match_rate', 0):.1%}")
+            out(f"\n🔍 Extraction Accuracy:")
+            out(f"   • F1 Score: {ex.get('f1_score', 0):.3f}")
+            out(f"   • Exact Match: {ex.get('exact_match_rate', 0):.1%}")
 
         # Efficiency
         if self.results.get("efficiency"):
             e = self.results["efficiency"]
-            print(f"\n⚡ Efficiency:")
-            print(f"   • Avg Response: {e.get('avg_response_time', 0):.2f}s")
+            out(f"\n⚡ Efficiency:")
+            out(f"   • Avg Response: {e.get('avg_response_time', 0):.2f}s")
 
         # Dimension Scores Visualization
         if "dimension_scores" in self.results:
-            print(f"\n{'='*80}")
-            print(" "*25 + "📈 DIMENSION SCORES (0-100)")
-            print("="*80)
+            out(f"\n{_EQ80}")
+            out(" "*25 + "📈 DIMENSION SCORES (0-100)")
+            out(_EQ80)
             
             dimension_scores = self.results["dimension_scores"]
             dimension_names = {
@@ -1150,9 +1683,8 @@ class RentalPeaceEvaluator:
                     name = dimension_names.get(dim, dim)
                     
                     # Visual bar
-                    bar_length = 40
-                    filled = int(bar_length * score / 100)
-                    bar = "█" * filled + "░" * (bar_length - filled)
+                    filled = min(max(int(_BAR_LENGTH * score / 100), 0), _BAR_LENGTH)
+                    bar = _FULL_BAR[:filled] + _EMPTY_BAR[filled:]
 
                     # color indicator
                     if score >= 80:
@@ -1162,15 +1694,15 @@ class RentalPeaceEvaluator:
                     else:
                         indicator = "🔴"
                     
-                    print(f"{indicator} {name:30s} [{bar}] {score:5.1f}/100")
+                    out(f"{indicator} {name:30s} [{bar}] {score:5.1f}/100")
             
-            print("="*80)
+            out(_EQ80)
 
 
         # Overall Score
         if "overall_score" in self.results:
-            print(f"\n{'='*80}")
-            print(f"   🏆 OVERALL SCORE: {self.results['overall_score']:.1f}/100")
+            out(f"\n{_EQ80}")
+            out(f"   🏆 OVERALL SCORE: {self.results['overall_score']:.1f}/100")
             
             score = self.results['overall_score']
             if score >= 88:
@@ -1182,49 +1714,62 @@ class RentalPeaceEvaluator:
             else:
                 rating = "⭐⭐ Needs Improvement"
             
-            print(f"   Rating: {rating}")
-            print(f"{'='*80}")
+            out(f"   Rating: {rating}")
+            out(f"{_EQ80}")
         
         if total_time > 0:
-            print(f"\n⏱️  Total Time: {total_time:.2f}s")
+            out(f"\n⏱️  Total Time: {total_time:.2f}s")
 
-        self.print_score_breakdown_tree()
+        self.print_score_breakdown_tree(out)
         
-        print("\n" + "="*80 + "\n")
+        out("\n" + _EQ80 + "\n")
+        log.info("\n".join(lines))
     
     def save_results(self, output_path: str = "evaluation_results.json"):
         """Save evaluation results"""
+        if ORJSON_AVAILABLE:
+            try:
+                data = orjson.dumps(
+                    self.results,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                )
+            except TypeError:
+                data = None
+            if data is not None:
+                with open(output_path, 'wb') as f:
+                    f.write(data)
+                log.info(f"💾 Results saved to: {output_path}")
+                return
+
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
-        print(f"💾 Results saved to: {output_path}")
+            json.dump(self.results, f, indent=2, ensure_ascii=False, default=_json_default)
+        log.info(f"💾 Results saved to: {output_path}")
 
-    def print_score_breakdown_tree(self):
+    def print_score_breakdown_tree(self, out=None):
         """
         Print score breakdown in a tree structure
+
+        Args:
+            out: Line sink to append to (e.g. print_summary's buffer);
+                by default the tree is collected and emitted in one write
         """
-        print("\n" + "="*80)
-        print(" "*20 + "🌳 SCORE CALCULATION BREAKDOWN")
-        print(" "*25 + "(Tree Structure)")
-        print("="*80)
+        lines = []
+        if out is None:
+            out = lines.append
+        out("\n" + _EQ80)
+        out(" "*20 + "🌳 SCORE CALCULATION BREAKDOWN")
+        out(" "*25 + "(Tree Structure)")
+        out(_EQ80)
         
         if "overall_score" not in self.results:
-            print("⚠️ Overall score not calculated yet")
+            out("⚠️ Overall score not calculated yet")
+            if lines:
+                log.info("\n".join(lines))
             return
         
         overall_score = self.results["overall_score"]
         dimension_scores = self.results.get("dimension_scores", {})
         
-        # Define dimension weights (consistent with _calculate_overall_score)
-        weights = {
-            "retrieval_quality": 0.20,
-            "answer_quality": 0.25,
-            "quick_questions_quality": 0.15,
-            "source_citation": 0.12,
-            "summary_quality": 0.12,
-            "extraction_accuracy": 0.10,
-            "efficiency": 0.06
-        }
-
         # Dimension name mapping
         dimension_names = {
             "retrieval_quality": "🎯 Retrieval Quality",
@@ -1237,19 +1782,14 @@ class RentalPeaceEvaluator:
         }
 
         # Print root node
-        print(f"\n🏆 Overall Score: {overall_score:.1f}/100")
-        print("│")
+        out(f"\n🏆 Overall Score: {overall_score:.1f}/100")
+        out("│")
 
         # Sort by weight (from high to low)
-        sorted_dimensions = sorted(
-            dimension_scores.keys(),
-            key=lambda x: weights.get(x, 0),
-            reverse=True
-        )
+        sorted_dimensions = [(dim, w) for dim, w in _DIM_WEIGHTS_BY_WEIGHT if dim in dimension_scores]
         
-        for idx, dimension in enumerate(sorted_dimensions):
+        for idx, (dimension, weight) in enumerate(sorted_dimensions):
             score = dimension_scores[dimension]
-            weight = weights.get(dimension, 0)
             name = dimension_names.get(dimension, dimension)
 
             # Check if it's the last dimension
@@ -1258,35 +1798,38 @@ class RentalPeaceEvaluator:
             extension = "  " if is_last else "│ "
 
             # Print dimension node
-            print(f"{prefix} [{weight:.0%}] {name} ({score:.1f}/100)")
+            out(f"{prefix} [{weight:.0%}] {name} ({score:.1f}/100)")
 
             # Print sub-metrics for this dimension
-            self._print_dimension_details(dimension, extension)
+            self._print_dimension_details(dimension, extension, out)
         
-        print("\n" + "="*80)
-        print("Legend: [X%] = Weight in overall score calculation")
-        print("="*80 + "\n")
+        out("\n" + _EQ80)
+        out("Legend: [X%] = Weight in overall score calculation")
+        out(_EQ80 + "\n")
+        if lines:
+            log.info("\n".join(lines))
 
 
-    def _print_dimension_details(self, dimension: str, prefix: str):
+    def _print_dimension_details(self, dimension: str, prefix: str, out):
         """
         Print detailed calculation methods and sub-metrics for each dimension
 
         Args:
             dimension: Dimension name
             prefix: Indentation prefix
+            out: Line sink shared with print_score_breakdown_tree
         """
         # 1. Retrieval Quality
         if dimension == "retrieval_quality" and self.results.get("retrieval_quality"):
             r = self.results["retrieval_quality"]
-            print(f"{prefix}   ├─ [50%] MRR: {r.get('mrr', 0):.3f}")
-            print(f"{prefix}   └─ [50%] Recall@5: {r.get('recall@5', 0):.1%}")
+            out(f"{prefix}   ├─ [50%] MRR: {r.get('mrr', 0):.3f}")
+            out(f"{prefix}   └─ [50%] Recall@5: {r.get('recall@5', 0):.1%}")
         
         # 2. Answer Quality
         elif dimension == "answer_quality" and self.results.get("answer_quality"):
             a = self.results["answer_quality"]
-            print(f"{prefix}   ├─ [60%] Faithfulness: {a.get('avg_faithfulness', 0):.1%}")
-            print(f"{prefix}   └─ [40%] ROUGE-L F1: {a.get('rougeL_f1', 0):.3f}")
+            out(f"{prefix}   ├─ [60%] Faithfulness: {a.get('avg_faithfulness', 0):.1%}")
+            out(f"{prefix}   └─ [40%] ROUGE-L F1: {a.get('rougeL_f1', 0):.3f}")
         
         # 3. Quick Questions Quality
         elif dimension == "quick_questions_quality" and self.results.get("quick_questions_quality"):
@@ -1297,36 +1840,36 @@ class RentalPeaceEvaluator:
                 keyword_score = q["overall_keyword_match"] * 100
                 faithfulness_score = q["overall_faithfulness"] * 100
                 
-                print(f"{prefix}   ├─ [20%] Speed Score: {speed_score:.1f}/100")
-                print(f"{prefix}   │      (Avg Response: {q['overall_avg_response_time']:.2f}s, target: ≤2s)")
-                print(f"{prefix}   ├─ [40%] Keyword Match: {q['overall_keyword_match']:.1%}")
-                print(f"{prefix}   └─ [40%] Faithfulness: {q['overall_faithfulness']:.1%}")
+                out(f"{prefix}   ├─ [20%] Speed Score: {speed_score:.1f}/100")
+                out(f"{prefix}   │      (Avg Response: {q['overall_avg_response_time']:.2f}s, target: ≤2s)")
+                out(f"{prefix}   ├─ [40%] Keyword Match: {q['overall_keyword_match']:.1%}")
+                out(f"{prefix}   └─ [40%] Faithfulness: {q['overall_faithfulness']:.1%}")
         
         # 4. Source Citation
         elif dimension == "source_citation" and self.results.get("source_citation"):
             sc = self.results["source_citation"]
-            print(f"{prefix}   ├─ [60%] Source Accuracy: {sc.get('source_accuracy', 0):.1%}")
-            print(f"{prefix}   └─ [40%] Source Completeness: {sc.get('source_completeness', 0):.1%}")
+            out(f"{prefix}   ├─ [60%] Source Accuracy: {sc.get('source_accuracy', 0):.1%}")
+            out(f"{prefix}   └─ [40%] Source Completeness: {sc.get('source_completeness', 0):.1%}")
         
         # 5. Summary Quality
         elif dimension == "summary_quality" and self.results.get("summary_quality"):
             s = self.results["summary_quality"]
-            print(f"{prefix}   ├─ [70%] Keyword Coverage: {s.get('avg_keyword_coverage', 0):.1%}")
-            print(f"{prefix}   └─ [30%] ROUGE-L F1: {s.get('avg_rougeL_f1', 0):.3f}")
+            out(f"{prefix}   ├─ [70%] Keyword Coverage: {s.get('avg_keyword_coverage', 0):.1%}")
+            out(f"{prefix}   └─ [30%] ROUGE-L F1: {s.get('avg_rougeL_f1', 0):.3f}")
         
         # 6. Extraction Accuracy
         elif dimension == "extraction_accuracy" and self.results.get("extraction_accuracy"):
             ex = self.results["extraction_accuracy"]
-            print(f"{prefix}   └─ [100%] F1 Score: {ex.get('f1_score', 0):.3f}")
-            print(f"{prefix}        (Exact: {ex.get('exact_match_rate', 0):.1%}, " +
+            out(f"{prefix}   └─ [100%] F1 Score: {ex.get('f1_score', 0):.3f}")
+            out(f"{prefix}        (Exact: {ex.get('exact_match_rate', 0):.1%}, " +
                 f"Partial: {ex.get('partial_match_rate', 0):.1%})")
         
         # 7. Efficiency
         elif dimension == "efficiency" and self.results.get("efficiency"):
             e = self.results["efficiency"]
             response_time = e.get("avg_response_time", 0)
-            print(f"{prefix}   └─ [100%] Response Time: {response_time:.2f}s (target: ≤3s)")
-            print(f"{prefix}        Formula: max(0, 100 - max(0, (time-3)*10))")
+            out(f"{prefix}   └─ [100%] Response Time: {response_time:.2f}s (target: ≤3s)")
+            out(f"{prefix}        Formula: max(0, 100 - max(0, (time-3)*10))")
 
 # ========================================
 # Main Program
@@ -1334,20 +1877,28 @@ class RentalPeaceEvaluator:
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="RentalPeace evaluator")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore cached LLM/retriever responses and measure every call fresh")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     API_KEY = os.getenv("OPENAI_API_KEY")
     MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
     TEST_DATA_FILE = "test_data_rentalpeace.json"
     CONTRACT_PDF = "Track_B_Tenancy_Agreement.pdf"
     
-    print("\n" + "="*80)
+    print("\n" + _EQ80)
     print(" "*20 + "🤖 RENTALPEACE EVALUATOR")
-    print("="*80)
+    print(_EQ80)
     
     if not API_KEY:
         print("❌ Error: OPENAI_API_KEY not found")
         return
 
     # Initialize RAG system
+    from langchain_rag_system import AdvancedContractRAG
+
     print(f"\n📝 Initializing RAG system...")
     rag = AdvancedContractRAG(api_key=API_KEY, model=MODEL)
 
@@ -1374,7 +1925,7 @@ def main():
         return
 
     # Create evaluator
-    evaluator = RentalPeaceEvaluator(rag_system=rag, evaluation_mode="fast")
+    evaluator = RentalPeaceEvaluator(rag_system=rag, evaluation_mode="fast", use_cache=not args.no_cache)
 
     # Run evaluation
     print("\n🚀 Starting evaluation...\n")
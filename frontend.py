@@ -7,11 +7,15 @@ Responsible for all page rendering and user interaction
 """
 
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import os
+import gc
+import copy
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import pandas as pd
 load_dotenv()
 
 # Import backend classes
@@ -22,13 +26,12 @@ from backend import (
     CacheManager
 )
 
-# Import RAG system
-from langchain_rag_system import AdvancedContractRAG
-
 # ==================================================
 # Frontend Interface Class
 # ==================================================
 import re
+import io
+import itertools
 
 # Custom CSS for quick question buttons
 QUICK_QUESTION_CSS = """
@@ -103,16 +106,17 @@ HERO_CSS = """
   .container {max-width:1280px;margin:0 auto;padding:0 16px;}
   @keyframes floatGrad {0%{background-position:0% 0%,100% 100%;}50%{background-position:20% 10%,80% 90%;}100%{background-position:0% 0%,100% 100%;}}
   .animated-bg {background-image: radial-gradient(800px circle at 20% 20%, rgba(167,139,250,0.22) 0%, transparent 55%), radial-gradient(900px circle at 80% 75%, rgba(255,154,98,0.20) 0%, transparent 55%), linear-gradient(180deg,#ffffff,#ffffff);background-repeat:no-repeat;animation:floatGrad 12s ease-in-out infinite;}
-  .hero-layer {position:fixed;inset:0;z-index:0;background-image: radial-gradient(1100px circle at 20% 20%, rgba(167,139,250,0.12) 0%, transparent 55%), radial-gradient(1100px circle at 80% 75%, rgba(255,154,98,0.12) 0%, transparent 55%), linear-gradient(180deg,#faf7ff,#ffffff);background-repeat:no-repeat;animation:floatGrad 16s ease-in-out infinite;}
+  .hero-layer {position:fixed;inset:0;z-index:0;background-image: radial-gradient(1100px circle at 20% 20%, rgba(167,139,250,0.12) 0%, transparent 55%), radial-gradient(1100px circle at 80% 75%, rgba(255,154,98,0.12) 0%, transparent 55%), linear-gradient(180deg,#faf7ff,#ffffff);background-repeat:no-repeat;}
   .hero-section {position:relative;z-index:1;padding:1.5rem 0 1rem;min-height:100vh;display:flex;align-items:center;justify-content:center;}
   .hero-container {width:80vw;max-width:1600px;margin:0 auto;padding:0 40px;}
-  @keyframes flowLight {0%{transform:translate3d(-16%, -12%, 0) rotate(0deg); filter:hue-rotate(0deg);}50%{transform:translate3d(18%, 12%, 0) rotate(180deg); filter:hue-rotate(18deg);}100%{transform:translate3d(-16%, -12%, 0) rotate(360deg); filter:hue-rotate(0deg);}}
+  @keyframes flowLight {0%{transform:translate3d(-16%, -12%, 0) rotate(0deg);}50%{transform:translate3d(18%, 12%, 0) rotate(180deg);}100%{transform:translate3d(-16%, -12%, 0) rotate(360deg);}}
   .hero-layer::before {content:""; position:absolute; inset:-10%; pointer-events:none;
     background:
       radial-gradient(580px circle at 26% 24%, rgba(255,154,98,0.16) 0%, transparent 62%),
       conic-gradient(from 0deg at 50% 50%, rgba(167,139,250,0.12), rgba(255,154,98,0.14), rgba(255,255,255,0.0), rgba(167,139,250,0.12));
     filter: blur(26px);
     animation: flowLight 16s ease-in-out infinite;
+    will-change: transform;
     opacity: 0.85;
   }
   .hero-layer::after {content:""; position:absolute; inset:-12%; pointer-events:none;
@@ -121,6 +125,7 @@ HERO_CSS = """
       conic-gradient(from 120deg at 50% 50%, rgba(255,154,98,0.10), rgba(167,139,250,0.12), rgba(255,255,255,0.0), rgba(255,154,98,0.10));
     filter: blur(22px);
     animation: flowLight 20s ease-in-out infinite reverse;
+    will-change: transform;
     opacity: 0.80;
   }
   .marketing-hero > div { text-align:center; }
@@ -140,7 +145,9 @@ GLOBAL_CSS = """
                       radial-gradient(1000px circle at 82% 78%, rgba(255,154,98,0.06) 0%, transparent 55%),
                       linear-gradient(180deg,#fbf9ff,#ffffff);
     background-repeat: no-repeat;
-    animation: globalFloatGrad 22s ease-in-out infinite;
+  }
+  @media (prefers-reduced-motion: no-preference) {
+    .stApp {animation: globalFloatGrad 22s ease-in-out infinite;}
   }
 </style>
 """
@@ -185,16 +192,15 @@ LOGIN_BG_CSS = """
   .login-hero-layer {position:fixed; inset:0; z-index:0; pointer-events:none;
     background-image: radial-gradient(1100px circle at 20% 20%, rgba(167,139,250,0.12) 0%, transparent 55%), radial-gradient(1100px circle at 80% 75%, rgba(255,154,98,0.12) 0%, transparent 55%), linear-gradient(180deg,#faf7ff,#ffffff);
     background-repeat:no-repeat;
-    animation: floatGrad 16s ease-in-out infinite;
   }
-  @keyframes floatGrad {0%{background-position:0% 0%,100% 100%;}50%{background-position:20% 10%,80% 90%;}100%{background-position:0% 0%,100% 100%;}}
-  @keyframes flowLight {0%{transform:translate3d(-16%, -12%, 0) rotate(0deg); filter:hue-rotate(0deg);}50%{transform:translate3d(18%, 12%, 0) rotate(180deg); filter:hue-rotate(18deg);}100%{transform:translate3d(-16%, -12%, 0) rotate(360deg); filter:hue-rotate(0deg);}}
+  @keyframes flowLight {0%{transform:translate3d(-16%, -12%, 0) rotate(0deg);}50%{transform:translate3d(18%, 12%, 0) rotate(180deg);}100%{transform:translate3d(-16%, -12%, 0) rotate(360deg);}}
   .login-hero-layer::before {content:""; position:absolute; inset:-10%; pointer-events:none;
     background:
       radial-gradient(580px circle at 26% 24%, rgba(255,154,98,0.16) 0%, transparent 62%),
       conic-gradient(from 0deg at 50% 50%, rgba(167,139,250,0.12), rgba(255,154,98,0.14), rgba(255,255,255,0.0), rgba(167,139,250,0.12));
     filter: blur(26px);
     animation: flowLight 16s ease-in-out infinite;
+    will-change: transform;
     opacity: 0.85;
   }
   .login-hero-layer::after {content:""; position:absolute; inset:-12%; pointer-events:none;
@@ -203,6 +209,7 @@ LOGIN_BG_CSS = """
       conic-gradient(from 120deg at 50% 50%, rgba(255,154,98,0.10), rgba(167,139,250,0.12), rgba(255,255,255,0.0), rgba(255,154,98,0.10));
     filter: blur(22px);
     animation: flowLight 20s ease-in-out infinite reverse;
+    will-change: transform;
     opacity: 0.80;
   }
   .login-content {position:relative; z-index:1;}
@@ -219,9 +226,7 @@ APP_BG_CSS = """
   .app-hero-layer {position:fixed; inset:0; z-index:0; pointer-events:none;
     background-image: radial-gradient(1100px circle at 20% 20%, rgba(167,139,250,0.12) 0%, transparent 55%), radial-gradient(1100px circle at 80% 75%, rgba(134,179,255,0.12) 0%, transparent 55%), linear-gradient(180deg,#faf7ff,#ffffff);
     background-repeat:no-repeat;
-    animation: appFloatGrad 16s ease-in-out infinite;
   }
-  @keyframes appFloatGrad {0%{background-position:0% 0%,100% 100%;}50%{background-position:20% 10%,80% 90%;}100%{background-position:0% 0%,100% 100%;}}
   @keyframes appFlowLight {0%{transform:translate3d(-14%, -10%, 0) rotate(0deg);}50%{transform:translate3d(16%, 10%, 0) rotate(180deg);}100%{transform:translate3d(-14%, -10%, 0) rotate(360deg);}}
   .app-hero-layer::before {content:""; position:absolute; inset:-10%; pointer-events:none;
     background:
@@ -229,6 +234,7 @@ APP_BG_CSS = """
       conic-gradient(from 0deg at 50% 50%, rgba(167,139,250,0.12), rgba(134,179,255,0.14), rgba(255,255,255,0.0), rgba(167,139,250,0.12));
     filter: blur(24px);
     animation: appFlowLight 16s ease-in-out infinite;
+    will-change: transform;
     opacity: 0.85;
   }
   .app-hero-layer::after {content:""; position:absolute; inset:-12%; pointer-events:none;
@@ -237,6 +243,7 @@ APP_BG_CSS = """
       conic-gradient(from 120deg at 50% 50%, rgba(134,179,255,0.10), rgba(167,139,250,0.12), rgba(255,255,255,0.0), rgba(134,179,255,0.10));
     filter: blur(20px);
     animation: appFlowLight 20s ease-in-out infinite reverse;
+    will-change: transform;
     opacity: 0.80;
   }
   .app-content-wrap {position:relative; z-index:1;}
@@ -269,52 +276,463 @@ IDENTITY_CSS = """
 </style>
 """
 
+def _minify_css(css: str) -> str:
+    """Strip comments and collapse whitespace inside a <style> block (the wrapper tags are kept)."""
+    head, sep, rest = css.partition("<style>")
+    inner, sep2, tail = rest.partition("</style>")
+    if not sep or not sep2:
+        return css
+    inner = re.sub(r'/\*.*?\*/', '', inner, flags=re.S)
+    inner = re.sub(r'\s+', ' ', inner)
+    inner = re.sub(r'\s*([{}:;,])\s*', r'\1', inner)
+    return f"<style>{inner.strip()}</style>"
+
+# Minified once at import: fewer bytes sent to the browser on every rerun
+QUICK_QUESTION_CSS = _minify_css(QUICK_QUESTION_CSS)
+HERO_CSS = _minify_css(HERO_CSS)
+GLOBAL_CSS = _minify_css(GLOBAL_CSS)
+APP_THEME_CSS = _minify_css(APP_THEME_CSS)
+LOGIN_BG_CSS = _minify_css(LOGIN_BG_CSS)
+QA_THEME_CSS = _minify_css(QA_THEME_CSS)
+APP_BG_CSS = _minify_css(APP_BG_CSS)
+IDENTITY_CSS = _minify_css(IDENTITY_CSS)
+
+def _css_bundle(*blocks: str) -> str:
+    """Merge minified <style> blocks into a single stylesheet (one CSSOM sheet per page)."""
+    inner = "".join(block[len("<style>"):-len("</style>")] for block in blocks)
+    return f"<style>{inner}</style>"
+
+# Per-page CSS bundles, merged once at import instead of on every rerun
+_LOGIN_CSS = _css_bundle(GLOBAL_CSS, APP_THEME_CSS, LOGIN_BG_CSS)
+_APP_CSS = _css_bundle(GLOBAL_CSS, APP_THEME_CSS)
+_APP_IDENT_CSS = _css_bundle(GLOBAL_CSS, APP_THEME_CSS, IDENTITY_CSS)
+_MAIN_APP_CSS = _css_bundle(GLOBAL_CSS, APP_THEME_CSS, APP_BG_CSS)
+
+# Static page chrome emitted as single Markdown deltas (CSS + opening wrappers, closers + footer)
+_COPYRIGHT_HTML = "<div style='text-align:center;color:#9aa1a9;font-size:.95rem;margin-top:8px;'>© 2025 RentalPeace. All rights reserved.</div>"
+_LOGIN_PREAMBLE = _LOGIN_CSS + "<div class='login-hero-layer'></div><div class='login-content'><div class='login-fixed'>"
+_LOGIN_CLOSER = "</div></div>" + _COPYRIGHT_HTML
+_MAIN_APP_PREAMBLE = _MAIN_APP_CSS + "<div class='app-hero-layer'></div><div class='app-content-wrap'>"
+_MAIN_APP_CLOSER = "</div>" + _COPYRIGHT_HTML
+_IDENTITY_FOOTER = "<div class=\"identity-footer\">Don't worry, you can always change this later in your settings</div>" + _COPYRIGHT_HTML
+
+def _minify_html(html: str) -> str:
+    """Drop whitespace between tags; text nodes are left intact."""
+    return re.sub(r'>\s+<', '><', html.strip())
+
+def _build_html(*parts: str) -> str:
+    """Assemble HTML from runtime pieces in one buffer.
+
+    Static markup stays a plain literal; this is for fragments that mix in
+    session values (username, role), so no chain of str copies is built.
+    """
+    buf = io.StringIO()
+    buf.writelines(parts)
+    return buf.getvalue()
+
+# Guidance page body (static, minified once at import)
+_GUIDANCE_HTML = _minify_html("""
+<div style="max-width:860px;margin:0 auto;padding:24px 16px;">
+  <h1 style="text-align:center;color:#2c3e50;margin-bottom:10px;">How to Use Rental Peace</h1>
+  <p style="text-align:center;color:#6b7280;">Welcome to Rental Peace — your AI-powered assistant for understanding rental agreements with clarity and confidence.</p>
+  <hr/>
+  <h3 style="color:#2c3e50;">Step 1 · Sign in</h3>
+  <p style="color:#6b7280;">Log in to your Rental Peace account to access the AI interpretation tools. If you’re new here, you can sign up on the same page.</p>
+  <hr/>
+  <h3 style="color:#2c3e50;">Step 2 · Choose Your Role</h3>
+  <p style="color:#6b7280;">After logging in, select your identity: I’m a Tenant or I’m a Landlord. Both options lead to the next step.</p>
+  <hr/>
+  <h3 style="color:#2c3e50;">Step 3 · Upload Your Contract</h3>
+  <p style="color:#6b7280;">Click the Browse File or Upload button to submit your rental agreement. Your document stays private and is used only for AI analysis.</p>
+  <hr/>
+  <h3 style="color:#2c3e50;">Step 4 · Let AI Interpret</h3>
+  <p style="color:#6b7280;">AI analyzes your contract and provides a clear summary of key clauses, highlights important rights or risks, and explains complex terms in plain language.</p>
+  <hr/>
+  <h3 style="color:#2c3e50;">Step 5 · Ask Follow-up Questions</h3>
+  <p style="color:#6b7280;">On the Q&A page, ask anything such as: What does this clause mean? Can I terminate early? Is this rent increase legal?</p>
+  <hr/>
+  <h3 style="color:#2c3e50;">Step 6 · Save or Share Insights</h3>
+  <p style="color:#6b7280;">Copy or download the AI interpretation results for future reference or share them with your agent, lawyer, or roommate.</p>
+  <hr/>
+  <p style="text-align:center;color:#2c3e50;">Rental Peace makes legal language understandable — sign with confidence and live with peace of mind.</p>
+  {copyright}
+</div>
+""".format(copyright=_COPYRIGHT_HTML))
+# Whole guidance page (styles + body) as one prebuilt string
+_GUIDANCE_PAGE = _APP_CSS + _GUIDANCE_HTML
+_IDENTITY_HEADER = _minify_html("""
+<section class="identity-section">
+  <div class="identity-container">
+    <div class="identity-title">I am a...</div>
+    <div class="identity-subtitle">Select your role to get personalized insights tailored to your needs</div>
+  </div>
+</section>
+""")
+
+# Marketing landing page (hero styles + markup); every hero block is a flex container,
+# so dropping inter-tag whitespace does not change the layout
+_MARKETING_PAGE = HERO_CSS + _minify_html("""
+<div class="hero-layer"></div>
+<section class="hero-section">
+  <div class="hero-container">
+    <div class="marketing-hero">
+      <div>
+      <div style="display:flex;align-items:center;gap:10px;margin-bottom:10px;">
+        <div class="social-avatars">
+          <span class="avatar"></span>
+          <span class="avatar"></span>
+          <span class="avatar"></span>
+          <span class="avatar"></span>
+        </div>
+        <div class="rating">
+          <span>⭐</span>
+          <span style="font-weight:600;color:#2c3e50;">4.9</span>
+          <span>• 2,500+ happy users in Singapore</span>
+        </div>
+      </div>
+      <h1 class="hero-title">Understand Your<br><span class="gradient-primary">Rental Agreement</span><br>in Minutes</h1>
+      <p class="hero-desc">AI-powered contract analysis for tenants and landlords. Get instant insights, ask questions, and extract key information from any rental agreement.</p>
+      <div class="cta-row">
+        <a class="cta cta-primary" href="?page=login" target="_self">Get Started Free →</a>
+        <a class="cta cta-outline" href="?page=guidance" target="_self">How to Use</a>
+      </div>
+      <div class="trust-line"></div>
+      <div class="trust">
+        <span> No credit card required</span>
+        <span> 100% secure & private</span>
+      </div>
+      <div class="copyright">© 2025 RentalPeace. All rights reserved.</div>
+    </div>
+  </div>
+</section>
+""")
+
+# Role selection cards (static, built once at import; the outer block is closed after the CTA button)
+_ROLE_CARD_TEMPLATE = """
+<div class="id-card-block">
+  <div class="id-card">
+  <div class="id-icon">{icon}</div>
+  <div class="id-h2">{title}</div>
+  <div class="id-desc">{desc}</div>
+  <div class="id-divider"></div>
+  <div class="id-list-title">WHAT YOU'LL GET:</div>
+  <ul class="id-list">{items}</ul>
+  </div>
+"""
+
+def _format_role_card(icon: str, title: str, desc: str, items: List[str]) -> str:
+    return _ROLE_CARD_TEMPLATE.format(
+        icon=icon, title=title, desc=desc,
+        items="".join(f'<li><span class="dot"></span>{item}</li>' for item in items),
+    )
+
+_TENANT_CARD_HTML = _format_role_card(
+    "👤", "I'm a Tenant",
+    "Understand your rights, obligations, and key terms in your rental agreement",
+    ["Know your rental rights", "Understand payment terms", "Check notice periods", "Review maintenance clauses"],
+)
+_LANDLORD_CARD_HTML = _format_role_card(
+    "🏢", "I'm a Landlord",
+    "Review tenant agreements and protect your property interests",
+    ["Verify contract completeness", "Check legal compliance", "Review tenant obligations", "Understand liability terms"],
+)
+# Rendered cards keyed by (role, locale); add entries here when localized copy lands
+_ROLE_CARDS = {
+    ("tenant", "en"): _TENANT_CARD_HTML,
+    ("landlord", "en"): _LANDLORD_CARD_HTML,
+}
+
+def _role_card_html(role: str, locale: str = "en") -> str:
+    """Prebuilt card markup for a role, falling back to English copy."""
+    return _ROLE_CARDS.get((role, locale)) or _ROLE_CARDS[(role, "en")]
+
+def _ensure_page_config(**kwargs):
+    """Call st.set_page_config only when the requested config differs from the last one applied.
+
+    The browser keeps the last page config across reruns, so repeating an identical call
+    (run() and main_app() both ask for the wide layout) is skipped. Pages with their own
+    title/layout still switch it, and a cleared session re-applies it.
+    """
+    config = tuple(sorted(kwargs.items()))
+    if st.session_state.get('_page_config') == config:
+        return
+    st.set_page_config(**kwargs)
+    st.session_state['_page_config'] = config
+
+def inject_css(css: str):
+    """Write a prebuilt <style> bundle into the page.
+    
+    This has to run on every rerun: Streamlit removes any element a run does not re-emit, so a
+    style block written once per session would vanish on the next interaction.
+    """
+    st.markdown(css, unsafe_allow_html=True)
+
+# OpenAI settings, read once per process (load_dotenv above has already populated the environment)
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+
+# Number of chat messages rendered inline; older ones sit behind a "Load older" button
+CHAT_WINDOW_SIZE = 10
+# Messages kept in session state; older ones live only in the SQLite Q&A history
+MAX_CHAT_MESSAGES = 30
+# Characters of each reference source kept in session state; the full text stays in SQLite
+SOURCE_PREVIEW_LENGTH = 500
+# Reply for prompts the small-talk pre-filter rejects (no retrieval or LLM call is made)
+OFF_TOPIC_ANSWER = (
+    "This doesn't seem to be a question about the loaded contract. "
+    "Please ask about its terms, e.g. rent, deposit, lease duration or termination."
+)
+
+# Quick question buttons per role: (icon, label, question)
+QUICK_QUESTIONS = {
+    'tenant': [
+        ("💰", "Monthly Rent", "What is the monthly rent amount?"),
+        ("📅", "Lease Duration", "What is the lease duration?"),
+        ("🏦", "Security Deposit", "What is the security deposit amount?"),
+        ("📆", "Payment Due", "When is the rent due each month?"),
+        ("🔧", "Maintenance", "What are my maintenance responsibilities?"),
+        ("🐕", "Pet Policy", "What is the pet policy?"),
+        ("🚪", "Termination", "What are the termination conditions?"),
+        ("💡", "Utilities", "Who pays for utilities?"),
+    ],
+    'landlord': [
+        ("💵", "Payment Terms", "What are the tenant's payment obligations?"),
+        ("⚠️", "Late Penalties", "What are the late payment penalties?"),
+        ("🏗️", "Maintenance", "What are my maintenance obligations as landlord?"),
+        ("🔑", "Access Rights", "What are the property access rights?"),
+        ("🔄", "Renewal Terms", "What are the lease renewal terms?"),
+        ("⛔", "Restrictions", "What are the tenant's restrictions?"),
+        ("📋", "Eviction", "What are the eviction conditions?"),
+        ("🛡️", "Liability", "What are my liability protections?"),
+    ],
+}
+
+def quick_questions_for(role: Optional[str]) -> List[tuple]:
+    """Quick questions shown to a role (anything other than tenant gets the landlord set)."""
+    return QUICK_QUESTIONS['tenant' if role == 'tenant' else 'landlord']
+
+# Session state keys and their initial values, applied once per session by ContractAssistantApp
+_SESSION_DEFAULTS = {
+    'authenticated': False,
+    'user_id': None,
+    'username': None,
+    'user_role': None,
+    'role_selected': False,
+    'rag_system': None,
+    'current_file_id': None,
+    'messages': [],
+    'pending_question': None,
+    'page': 'marketing',
+    'docs_loaded': False,  # RAG system currently holds the selected contract
+    'results_version': 0,  # Bumped whenever a summary or extraction is saved
+    'summaries': {},  # (file_id, summary_type) -> summary shown in Tab3
+    'extractions': {},  # file_id -> key information shown in Tab4
+    'chat_window': CHAT_WINDOW_SIZE,  # Number of recent chat messages rendered
+    'embed_prefetch': None,  # (file_id, questions, future) of the running prefetch
+    'processing_job': None,  # backend.ProcessingJob of an upload being processed in the background
+    'answer_prefetch': None,  # (file_id, {question: future}) of quick answers computed after upload
+}
+
+# Escapes every $ as \$ so Markdown does not start LaTeX (single C-level pass via str.translate)
+_DOLLAR_TABLE = str.maketrans({'$': r'\$'})
+
+def escape_dollars(text: str) -> str:
+    """Escape $ as \\$; text without any $ (most answers) is returned as-is without a copy."""
+    return text.translate(_DOLLAR_TABLE) if '$' in text else text
+
 def safe_markdown(text):
     """Safely escape $ signs before Markdown rendering to prevent LaTeX triggering."""
     
-    import re
     # Replace all $ with \$ to prevent LaTeX rendering
     # This handles both single $ and $$ patterns
-    text = text.replace('$', r'\$')
+    text = escape_dollars(text)
     # Render with markdown (without unsafe_allow_html)
     st.markdown(text)
 
+_BACKTICK_RUN = re.compile(r'`{3,}')
+
+def sources_markdown(sources: List[Dict]) -> str:
+    """Render reference sources as a single static Markdown block (no per-source widgets)."""
+    parts = []
+    for i, source in enumerate(sources, 1):
+        page_number = source.get('page', 'N/A')
+        if page_number is not None and isinstance(page_number, int):
+            page_number += 1  # Change page numbering from 0 to 1-based
+        else:
+            page_number = 'N/A'
+        content = source.get('preview', source.get('content', ''))
+        if source.get('content_ref'):
+            content += "..."
+        # Contract text is shown verbatim; a fence longer than any backtick run inside keeps it in one block
+        fence = "```" if "```" not in content else "`" * (max(map(len, _BACKTICK_RUN.findall(content))) + 1)
+        parts.append(f"**📄 Source {i} - Page {page_number}**\n\n{fence}text\n{content}\n{fence}")
+    return "\n\n---\n\n".join(parts)
+
+def _rerun_fragment():
+    """Rerun only the calling fragment; fall back to a full rerun when it is running as part of the whole app."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def _queue_quick_question(question: str):
+    """Button callback: queue a quick question so this run already knows a Q&A is in flight."""
+    st.session_state.pending_question = question
+
+def _show_older_messages():
+    """Button callback: widen the rendered chat window before the rerun draws it."""
+    st.session_state.chat_window += CHAT_WINDOW_SIZE
+
+def compact_sources(sources: List[Dict], qa_id: Optional[str]) -> List[Dict]:
+    """Keep only a preview of each source for the chat history.
+    
+    Sources longer than SOURCE_PREVIEW_LENGTH get a content_ref (qa_id, index) and their length,
+    so the full text can be read back from the saved Q&A history on demand. Without a qa_id
+    (e.g. a precomputed quick answer) the content is kept whole.
+    """
+    compact = []
+    for i, source in enumerate(sources):
+        content = source.get('content', '')
+        entry = {"page": source.get('page'), "preview": content}
+        if qa_id and len(content) > SOURCE_PREVIEW_LENGTH:
+            entry["preview"] = content[:SOURCE_PREVIEW_LENGTH]
+            entry["content_ref"] = (qa_id, i)
+            entry["length"] = len(content)
+        compact.append(entry)
+    return compact
+
+# One entry per (user, files_version); bounded so superseded versions are dropped before the ttl ends
+RECENT_FILES_CACHE_ENTRIES = 128
+
+# Version numbers are drawn from one process-wide counter, so concurrent bumps never reuse a value
+_FILES_VERSION_COUNTER = itertools.count(1)
+
+@st.cache_resource
+def _files_versions() -> Dict[str, int]:
+    """Recent files version per user, kept server-side so every session (browser tab) of a user sees each bump."""
+    return {}
+
+def files_version(user_id: str) -> int:
+    """Current recent files version of a user (0 until their list first changes in this process)."""
+    return _files_versions().get(user_id, 0)
+
+def bump_files_version(user_id: str):
+    """Invalidate the user's cached recent files list in all of their sessions."""
+    _files_versions()[user_id] = next(_FILES_VERSION_COUNTER)
+
+@st.cache_data(ttl=60, max_entries=RECENT_FILES_CACHE_ENTRIES, show_spinner=False)
+def recent_files_cached(_file_processor: FileProcessor, user_id: str, files_version: int, limit: int = 20) -> List[Dict]:
+    """Recent files for the current user, reused across reruns until files_version changes."""
+    return _file_processor.get_recent_files(user_id, limit=limit)
+
+# In-memory tier in front of the SQLite result tables; bounded so superseded results_version keys
+# (and other users' files) are evicted oldest-first instead of living for the whole ttl
+RESULT_CACHE_ENTRIES = 64
+
+@st.cache_data(ttl=3600, max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def cached_summary(_cache_manager: CacheManager, file_id: str, summary_type: str, results_version: int) -> Optional[str]:
+    """Stored summary for a file, reused across reruns until results_version changes."""
+    return _cache_manager.get_cached_summary(file_id, summary_type)
+
+@st.cache_data(ttl=3600, max_entries=RESULT_CACHE_ENTRIES, show_spinner=False)
+def cached_extraction(_cache_manager: CacheManager, file_id: str, results_version: int) -> Optional[Dict]:
+    """Stored key information for a file, reused across reruns until results_version changes."""
+    return _cache_manager.get_cached_extraction(file_id)
+
+@st.cache_resource
+def prefetch_executor() -> ThreadPoolExecutor:
+    """Small shared pool for background embedding prefetch (capped to bound API usage)."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="embed-prefetch")
+
+# Quick-answer precompute gets its own small pool: its LLM calls must not hold up other sessions'
+# embedding prefetches, and each upload queues one call per quick question
+ANSWER_PRECOMPUTE_WORKERS = 2
+
+@st.cache_resource
+def answer_precompute_executor() -> ThreadPoolExecutor:
+    """Bounded pool for answering quick questions in the background after an upload."""
+    return ThreadPoolExecutor(max_workers=ANSWER_PRECOMPUTE_WORKERS, thread_name_prefix="answer-precompute")
+
+def precompute_answer(rag_system, vectorstore, cache_manager: CacheManager, file_id: str, question: str) -> None:
+    """Answer one quick question off the page thread and seed the file's semantic Q&A cache with it.
+    
+    Runs without conversation memory so it cannot interleave with the user's own chat, and
+    drops the answer if another contract was loaded into the RAG system in the meantime.
+    """
+    if vectorstore is None or rag_system.vectorstore is not vectorstore:
+        return
+    response = rag_system.ask_question(question, use_memory=False)
+    if rag_system.vectorstore is not vectorstore:
+        return
+    cache_manager.add_semantic_qa(
+        file_id, rag_system.embeddings.embed_query(question),
+        response["answer"], response.get("sources", [])
+    )
+
+@st.cache_resource
+def persist_executor() -> ThreadPoolExecutor:
+    """Single writer for Q&A history rows, so SQLite inserts stay ordered and off the answer path.
+    
+    Its worker is not a daemon thread, so queued writes still finish when the process exits.
+    """
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="qa-persist")
+
+@st.cache_resource
+def shared_database_manager() -> DatabaseManager:
+    """One DatabaseManager per process, so the schema setup in its constructor runs once, not on every rerun."""
+    return DatabaseManager()
+
+@st.cache_resource
+def shared_openai_clients(api_key: Optional[str], model: str):
+    """LLM and embeddings clients shared by every session, so HTTP connections are reused across users."""
+    from langchain_rag_system import AdvancedContractRAG
+    return (
+        AdvancedContractRAG.create_llm(api_key, model),
+        AdvancedContractRAG.create_base_embeddings(api_key),
+    )
+
+# Bounds how many users keep a query embedding cache in memory at once
+USER_EMBEDDINGS_ENTRIES = 32
+
+@st.cache_resource(max_entries=USER_EMBEDDINGS_ENTRIES)
+def user_query_embeddings(user_id: str):
+    """Query embedding cache shared by all sessions (browser tabs) of one user.
+    
+    The RAG object itself stays per session because it holds the loaded contract and the chat memory.
+    """
+    from langchain_rag_system import QueryCachedEmbeddings
+    _, base_embeddings = shared_openai_clients(OPENAI_API_KEY, OPENAI_MODEL)
+    return QueryCachedEmbeddings(base_embeddings)
+
 class ContractAssistantApp:
     """Main application"""
     
     def __init__(self):
-        # Initialize managers
-        self.db_manager = DatabaseManager()
-        self.user_manager = UserManager(self.db_manager)
-        self.file_processor = FileProcessor(self.db_manager)
-        self.cache_manager = CacheManager(self.db_manager)
-        
-        # Initialize session state
-        if 'authenticated' not in st.session_state:
-            st.session_state.authenticated = False
-        if 'user_id' not in st.session_state:
-            st.session_state.user_id = None
-        if 'username' not in st.session_state:
-            st.session_state.username = None
-        if 'user_role' not in st.session_state:
-            st.session_state.user_role = None
-        if 'role_selected' not in st.session_state:
-            st.session_state.role_selected = False
-        if 'rag_system' not in st.session_state:
-            st.session_state.rag_system = None
-        if 'current_file_id' not in st.session_state:
-            st.session_state.current_file_id = None
-        if 'messages' not in st.session_state:
-            st.session_state.messages = []
-        if 'pending_question' not in st.session_state:
-            st.session_state.pending_question = None
-        if 'page' not in st.session_state:
-            st.session_state.page = 'marketing'
+        # Initialize session state (containers are copied so sessions never share them)
+        for key, value in _SESSION_DEFAULTS.items():
+            if key not in st.session_state:
+                st.session_state[key] = copy.copy(value)
+    
+    # Managers are created on first use, so pages that never touch the database skip them
+    @cached_property
+    def db_manager(self) -> DatabaseManager:
+        return shared_database_manager()
+    
+    @cached_property
+    def user_manager(self) -> UserManager:
+        return UserManager(self.db_manager)
+    
+    @cached_property
+    def file_processor(self) -> FileProcessor:
+        return FileProcessor(self.db_manager)
+    
+    @cached_property
+    def cache_manager(self) -> CacheManager:
+        return CacheManager(self.db_manager)
     
     def login_page(self):
         """Login page"""
-        st.markdown(GLOBAL_CSS + APP_THEME_CSS + LOGIN_BG_CSS, unsafe_allow_html=True)
-        st.markdown("<div class='login-hero-layer'></div><div class='login-content'><div class='login-fixed'>", unsafe_allow_html=True)
+        st.markdown(_LOGIN_PREAMBLE, unsafe_allow_html=True)
         st.title("Login")
         
         tab1, tab2 = st.tabs(["Login", "Register"])
@@ -358,89 +776,29 @@ class ContractAssistantApp:
                             st.success("Registration successful! Please login")
                         else:
                             st.error(result.get("message", "Registration failed"))
-        st.markdown("</div></div>", unsafe_allow_html=True)
-        st.markdown("<div style='text-align:center;color:#9aa1a9;font-size:.95rem;margin-top:8px;'>© 2025 RentalPeace. All rights reserved.</div>", unsafe_allow_html=True)
+        st.markdown(_LOGIN_CLOSER, unsafe_allow_html=True)
     
     def guidance_page(self):
-        st.set_page_config(page_title="How to Use", page_icon="📘", layout="centered")
-        st.markdown(GLOBAL_CSS + APP_THEME_CSS, unsafe_allow_html=True)
-        st.markdown(
-            """
-            <div style="max-width:860px;margin:0 auto;padding:24px 16px;">
-              <h1 style="text-align:center;color:#2c3e50;margin-bottom:10px;">How to Use Rental Peace</h1>
-              <p style="text-align:center;color:#6b7280;">Welcome to Rental Peace — your AI-powered assistant for understanding rental agreements with clarity and confidence.</p>
-              <hr/>
-              <h3 style="color:#2c3e50;">Step 1 · Sign in</h3>
-              <p style="color:#6b7280;">Log in to your Rental Peace account to access the AI interpretation tools. If you’re new here, you can sign up on the same page.</p>
-              <hr/>
-              <h3 style="color:#2c3e50;">Step 2 · Choose Your Role</h3>
-              <p style="color:#6b7280;">After logging in, select your identity: I’m a Tenant or I’m a Landlord. Both options lead to the next step.</p>
-              <hr/>
-              <h3 style="color:#2c3e50;">Step 3 · Upload Your Contract</h3>
-              <p style="color:#6b7280;">Click the Browse File or Upload button to submit your rental agreement. Your document stays private and is used only for AI analysis.</p>
-              <hr/>
-              <h3 style="color:#2c3e50;">Step 4 · Let AI Interpret</h3>
-              <p style="color:#6b7280;">AI analyzes your contract and provides a clear summary of key clauses, highlights important rights or risks, and explains complex terms in plain language.</p>
-              <hr/>
-              <h3 style="color:#2c3e50;">Step 5 · Ask Follow-up Questions</h3>
-              <p style="color:#6b7280;">On the Q&A page, ask anything such as: What does this clause mean? Can I terminate early? Is this rent increase legal?</p>
-              <hr/>
-              <h3 style="color:#2c3e50;">Step 6 · Save or Share Insights</h3>
-              <p style="color:#6b7280;">Copy or download the AI interpretation results for future reference or share them with your agent, lawyer, or roommate.</p>
-              <hr/>
-              <p style="text-align:center;color:#2c3e50;">Rental Peace makes legal language understandable — sign with confidence and live with peace of mind.</p>
-              <div style='text-align:center;color:#9aa1a9;font-size:.95rem;margin-top:8px;'>© 2025 RentalPeace. All rights reserved.</div>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
+        _ensure_page_config(page_title="How to Use", page_icon="📘", layout="centered")
+        st.markdown(_GUIDANCE_PAGE, unsafe_allow_html=True)
     
     def role_selection_page(self):
-        st.set_page_config(page_title="Select Role", page_icon="👤", layout="centered")
-        st.markdown(GLOBAL_CSS + APP_THEME_CSS, unsafe_allow_html=True)
-        st.markdown(IDENTITY_CSS, unsafe_allow_html=True)
+        _ensure_page_config(page_title="Select Role", page_icon="👤", layout="centered")
+        inject_css(_APP_IDENT_CSS)
         # 顶部左侧固定 Logout 按钮（不占用卡片区域）
         top_left, top_right = st.columns([2, 7])
         with top_left:
             st.markdown("<div class='logout-top'>", unsafe_allow_html=True)
             if st.button("🚪 Logout", use_container_width=True):
-                for key in list(st.session_state.keys()):
-                    del st.session_state[key]
+                self._reset_active_document()
+                st.session_state.clear()
                 st.rerun()
             st.markdown("</div>", unsafe_allow_html=True)
-        st.markdown(
-            """
-            <section class="identity-section">
-              <div class="identity-container">
-                <div class="identity-title">I am a...</div>
-                <div class="identity-subtitle">Select your role to get personalized insights tailored to your needs</div>
-              </div>
-            </section>
-            """,
-            unsafe_allow_html=True,
-        )
+        st.markdown(_IDENTITY_HEADER, unsafe_allow_html=True)
 
         col1, col2 = st.columns(2)
         with col1:
-            st.markdown(
-                """
-                <div class="id-card-block">
-                  <div class="id-card">
-                  <div class="id-icon">👤</div>
-                  <div class="id-h2">I'm a Tenant</div>
-                  <div class="id-desc">Understand your rights, obligations, and key terms in your rental agreement</div>
-                  <div class="id-divider"></div>
-                  <div class="id-list-title">WHAT YOU'LL GET:</div>
-                  <ul class="id-list">
-                    <li><span class="dot"></span>Know your rental rights</li>
-                    <li><span class="dot"></span>Understand payment terms</li>
-                    <li><span class="dot"></span>Check notice periods</li>
-                    <li><span class="dot"></span>Review maintenance clauses</li>
-                  </ul>
-                  </div>
-                """,
-                unsafe_allow_html=True,
-            )
+            st.markdown(_role_card_html("tenant"), unsafe_allow_html=True)
             st.markdown("<div class='id-cta-wrap'>", unsafe_allow_html=True)
             if st.button("Continue as Tenant →", use_container_width=True):
                 result = self.user_manager.set_user_role(st.session_state.user_id, 'tenant')
@@ -453,25 +811,7 @@ class ContractAssistantApp:
             st.markdown("</div></div>", unsafe_allow_html=True)
 
         with col2:
-            st.markdown(
-                """
-                <div class="id-card-block">
-                  <div class="id-card">
-                  <div class="id-icon">🏢</div>
-                  <div class="id-h2">I'm a Landlord</div>
-                  <div class="id-desc">Review tenant agreements and protect your property interests</div>
-                  <div class="id-divider"></div>
-                  <div class="id-list-title">WHAT YOU'LL GET:</div>
-                  <ul class="id-list">
-                    <li><span class="dot"></span>Verify contract completeness</li>
-                    <li><span class="dot"></span>Check legal compliance</li>
-                    <li><span class="dot"></span>Review tenant obligations</li>
-                    <li><span class="dot"></span>Understand liability terms</li>
-                  </ul>
-                  </div>
-                """,
-                unsafe_allow_html=True,
-            )
+            st.markdown(_role_card_html("landlord"), unsafe_allow_html=True)
             st.markdown("<div class='id-cta-wrap'>", unsafe_allow_html=True)
             if st.button("Continue as Landlord →", use_container_width=True):
                 result = self.user_manager.set_user_role(st.session_state.user_id, 'landlord')
@@ -483,120 +823,192 @@ class ContractAssistantApp:
                     st.error("Failed to set role, please try again")
             st.markdown("</div></div>", unsafe_allow_html=True)
 
-        st.markdown(
-            """
-            <div class="identity-footer">Don't worry, you can always change this later in your settings</div>
-            """,
-            unsafe_allow_html=True,
-        )
-        st.markdown("<div style='text-align:center;color:#9aa1a9;font-size:.95rem;margin-top:8px;'>© 2025 RentalPeace. All rights reserved.</div>", unsafe_allow_html=True)
+        st.markdown(_IDENTITY_FOOTER, unsafe_allow_html=True)
     
     def marketing_page(self):
         """Marketing page - styled like frontend_reference.py"""
-        st.markdown(HERO_CSS, unsafe_allow_html=True)
-        st.markdown("""
-            <div class="hero-layer"></div>
-            <section class="hero-section">
-              <div class="hero-container">
-                <div class="marketing-hero">
-                  <div>
-                  <div style="display:flex;align-items:center;gap:10px;margin-bottom:10px;">
-                    <div class="social-avatars">
-                      <span class="avatar"></span>
-                      <span class="avatar"></span>
-                      <span class="avatar"></span>
-                      <span class="avatar"></span>
-                    </div>
-                    <div class="rating">
-                      <span>⭐</span>
-                      <span style="font-weight:600;color:#2c3e50;">4.9</span>
-                      <span>• 2,500+ happy users in Singapore</span>
-                    </div>
-                  </div>
-                  <h1 class="hero-title">Understand Your<br><span class="gradient-primary">Rental Agreement</span><br>in Minutes</h1>
-                  <p class="hero-desc">AI-powered contract analysis for tenants and landlords. Get instant insights, ask questions, and extract key information from any rental agreement.</p>
-                  <div class="cta-row">
-                    <a class="cta cta-primary" href="?page=login" target="_self">Get Started Free →</a>
-                    <a class="cta cta-outline" href="?page=guidance" target="_self">How to Use</a>
-                  </div>
-                  <div class="trust-line"></div>
-                  <div class="trust">
-                    <span> No credit card required</span>
-                    <span> 100% secure & private</span>
-                  </div>
-                  <div class="copyright">© 2025 RentalPeace. All rights reserved.</div>
-                </div>
-              </div>
-            </section>
-        """, unsafe_allow_html=True)
+        st.markdown(_MARKETING_PAGE, unsafe_allow_html=True)
     
     def init_user_rag_system(self):
-        """Initialize user's RAG system"""
+        """Initialize user's RAG system on first use (upload or load) and return it"""
         if st.session_state.rag_system is None:
+            # Imported lazily: LangChain is only needed once a user uploads or loads a contract
+            from langchain_rag_system import AdvancedContractRAG
+            # Clients are process-wide and query embeddings per user; the vector store and memory stay per session
+            llm, base_embeddings = shared_openai_clients(OPENAI_API_KEY, OPENAI_MODEL)
             st.session_state.rag_system = AdvancedContractRAG(
-                api_key = os.getenv("OPENAI_API_KEY"),
-                model=os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+                api_key=OPENAI_API_KEY,
+                model=OPENAI_MODEL,
+                llm=llm,
+                base_embeddings=base_embeddings,
+                embeddings=user_query_embeddings(st.session_state.user_id)
             )
             # Set user-specific cache directory
             user_cache_dir = Path(f"user_data/{st.session_state.user_id}/cache")
             user_cache_dir.mkdir(parents=True, exist_ok=True)
             st.session_state.rag_system.cache_dir = user_cache_dir
+        return st.session_state.rag_system
+    
+    def _append_message(self, message: Dict):
+        """Append a chat message, evicting the oldest beyond MAX_CHAT_MESSAGES (already saved by save_qa_history).
+        
+        The $-escaped Markdown is stored with the message once, so history reruns do not re-escape it.
+        """
+        message.setdefault("content_rendered", escape_dollars(message["content"]))
+        messages = st.session_state.messages
+        messages.append(message)
+        if len(messages) > MAX_CHAT_MESSAGES:
+            evicted = messages[:-MAX_CHAT_MESSAGES]
+            for old in evicted:
+                old.pop("sources", None)
+                old.pop("sources_md", None)
+            del messages[:-MAX_CHAT_MESSAGES]
+    
+    def _reset_active_document(self):
+        """Unload the active contract and chat history, keeping the RAG object (and its API clients) for reuse."""
+        self._cancel_quick_answers()
+        rag = st.session_state.get('rag_system')
+        if rag:
+            rag.clear_all_documents()  # Also clears conversation memory
+        st.session_state.current_file_id = None
+        st.session_state.messages = []
+        st.session_state.chat_window = CHAT_WINDOW_SIZE
+        st.session_state.docs_loaded = False
+        # Release the dropped vector store and source payloads now rather than at the next GC cycle
+        gc.collect()
+    
+    def _prefetch_question_embeddings(self, questions: List[str]):
+        """Embed the quick questions in the background so clicking one skips the embedding round trip."""
+        file_id = st.session_state.current_file_id
+        prefetch = st.session_state.embed_prefetch
+        if not st.session_state.docs_loaded or (prefetch and prefetch[:2] == (file_id, tuple(questions))):
+            return
+        future = prefetch_executor().submit(
+            st.session_state.rag_system.prewarm_query_embeddings, list(questions)
+        )
+        st.session_state.embed_prefetch = (file_id, tuple(questions), future)
+    
+    def _cancel_quick_answers(self):
+        """Drop quick answers still queued for a contract that is no longer active."""
+        answer_prefetch = st.session_state.get('answer_prefetch')
+        if answer_prefetch:
+            for future in answer_prefetch[1].values():
+                future.cancel()
+            st.session_state.answer_prefetch = None
+    
+    def _precompute_quick_answers(self, file_id: str):
+        """Queue the current role's quick questions for background answering after an upload."""
+        self._cancel_quick_answers()
+        rag_system = st.session_state.rag_system
+        futures = {
+            question: answer_precompute_executor().submit(
+                precompute_answer, rag_system, rag_system.vectorstore, self.cache_manager, file_id, question
+            )
+            for _, _, question in quick_questions_for(st.session_state.user_role)
+        }
+        st.session_state.answer_prefetch = (file_id, futures)
+    
+    def _save_history(self, file_id: str, prompt: str, response: Dict):
+        """Save an answer to the Q&A history off the critical path: the id is assigned now, the row is written in the background."""
+        response["qa_id"] = self.cache_manager.new_qa_id(st.session_state.user_id, prompt)
+        persist_executor().submit(
+            self.cache_manager.save_qa_history,
+            st.session_state.user_id,
+            file_id,
+            prompt,
+            response["answer"],
+            response.get("sources", []),
+            qa_id=response["qa_id"]
+        )
+    
+    def answer_question(self, prompt: str, stream: bool = False) -> Dict:
+        """Answer a Q&A prompt, reusing a semantically equivalent earlier answer for this file when possible.
+        
+        With stream=True a fresh answer is written token by token with st.write_stream and the
+        returned dict is marked "streamed" (already displayed).
+        """
+        rag_system = st.session_state.rag_system
+        file_id = st.session_state.current_file_id
+        # Once the chat has history a typed prompt may be a follow-up ("and for the deposit?") whose
+        # meaning depends on that context; the fixed quick questions never do, so they stay cacheable
+        use_cache = (not rag_system.has_conversation_history()
+                     or any(prompt == question for _, _, question in quick_questions_for(st.session_state.user_role)))
+        
+        # Wait for an in-flight prefetch of this prompt instead of embedding it twice
+        prefetch = st.session_state.embed_prefetch
+        if prefetch and prefetch[0] == file_id and prompt in prefetch[1]:
+            try:
+                prefetch[2].result(timeout=30)
+            except Exception as e:
+                print(f"⚠️ Embedding prefetch failed: {e}")
+        # Likewise wait for a quick answer already being computed; it lands in the semantic cache.
+        # One still queued behind others is dropped and answered right away instead.
+        answer_prefetch = st.session_state.answer_prefetch
+        if answer_prefetch and answer_prefetch[0] == file_id and prompt in answer_prefetch[1]:
+            future = answer_prefetch[1][prompt]
+            if not future.cancel():
+                try:
+                    future.result(timeout=120)
+                except Exception as e:
+                    print(f"⚠️ Quick answer precompute failed: {e}")
+        
+        # Semantic cache lookup (rephrased questions skip retrieval and the LLM)
+        query_embedding = None
+        try:
+            query_embedding = rag_system.embeddings.embed_query(prompt)
+            cached = self.cache_manager.get_semantic_qa(
+                file_id, query_embedding, embedder=rag_system.embeddings
+            ) if use_cache else None
+            if cached:
+                # The hit is recorded as its own history row (with the original answer's sources,
+                # which back the full source text) and as a chat turn for follow-up questions
+                response = {"answer": cached["answer"], "sources": cached["sources"], "cached": True}
+                rag_system.remember_exchange(prompt, response["answer"])
+                self._save_history(file_id, prompt, response)
+                return response
+        except Exception as e:
+            print(f"⚠️ Semantic cache unavailable: {e}")
+        
+        # Small talk skips retrieval and the LLM entirely
+        if not rag_system.is_relevant_question(prompt):
+            return {"answer": OFF_TOPIC_ANSWER, "sources": []}
+        
+        if stream:
+            answer = st.write_stream(rag_system.ask_question_stream(prompt))
+            response = rag_system.last_stream_result or {"answer": answer, "sources": []}
+            response["streamed"] = True
+        else:
+            response = rag_system.ask_question(prompt)
+        
+        self._save_history(file_id, prompt, response)
+        if query_embedding is not None:
+            self.cache_manager.add_semantic_qa(
+                file_id, query_embedding, response["answer"], response.get("sources", []),
+                qa_id=response["qa_id"]
+            )
+        return response
     
     def main_app(self):
         """Main application interface"""
-        st.set_page_config(page_title="Contract Assistant", page_icon="📄", layout="wide")
-        st.markdown(GLOBAL_CSS + APP_THEME_CSS + APP_BG_CSS, unsafe_allow_html=True)
-        st.markdown("<div class='app-hero-layer'></div><div class='app-content-wrap'>", unsafe_allow_html=True)
+        _ensure_page_config(page_title="Contract Assistant", page_icon="📄", layout="wide")
+        st.markdown(_MAIN_APP_PREAMBLE, unsafe_allow_html=True)
         
-        # Initialize RAG system
-        self.init_user_rag_system()
+        # The RAG system (and LangChain) is only needed once there is a contract to work on;
+        # uploads and loads create it on demand via init_user_rag_system
+        if st.session_state.current_file_id:
+            self.init_user_rag_system()
+        
+        # Recent files (one cached query shared by the sidebar, file bar and Compare tab)
+        all_files = recent_files_cached(
+            self.file_processor,
+            st.session_state.user_id,
+            files_version(st.session_state.user_id)
+        )
+        files_by_id = {f['file_id']: f for f in all_files}
         
         # Sidebar
         with st.sidebar:
-            username_display = st.session_state.username or "Guest"
-            role_display = "🏡 Tenant" if st.session_state.get('user_role') == 'tenant' else ("🏢 Landlord" if st.session_state.get('user_role') == 'landlord' else "Unknown")
-            avatar_text = (username_display[:1].upper() if isinstance(username_display, str) and len(username_display) > 0 else "?")
-            st.markdown(f"<div class='profile-card'><div class='profile-avatar'>{avatar_text}</div><div class='profile-name'>{username_display}</div><div class='profile-role'>{role_display}</div></div>", unsafe_allow_html=True)
-            
-            if st.button("Logout"):
-                # ⭐ Key modification 6: Clean up RAG system on logout
-                if st.session_state.rag_system:
-                    st.session_state.rag_system.clear_all_documents()
-                for key in list(st.session_state.keys()):
-                    del st.session_state[key]
-                st.rerun()
-            
-            st.divider()
-            
-            # Display recent files
-            st.subheader("📁 Recent Files")
-            recent_files = self.file_processor.get_recent_files(st.session_state.user_id)
-            
-            if recent_files:
-                for file in recent_files:
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write(f"📄 {file['filename'][:20]}...")
-                    with col2:
-                        if st.button("Load", key=f"load_{file['file_id']}"):
-                            if self.file_processor.load_processed_file(
-                                st.session_state.user_id,
-                                file['file_id'],
-                                st.session_state.rag_system
-                            ):
-                                st.session_state.current_file_id = file['file_id']
-                                # ⭐ Key modification 7: Clear chat history when switching files
-                                st.session_state.messages = []
-                                st.success("File loaded")
-                                st.rerun()
-                    
-                    # Display file information
-                    with st.expander(f"Details"):
-                        st.write(f"Pages: {file['num_pages']}")
-                        st.write(f"Chunks: {file['num_chunks']}")
-                        st.write(f"Upload time: {file['upload_time']}")
-            else:
-                st.info("No files uploaded yet")
+            self._render_sidebar(all_files)
         
         # Main interface
         st.title("📄 RentalPeace-Your Intelligent Assistant")
@@ -605,10 +1017,7 @@ class ContractAssistantApp:
         current_file_info = None
         if st.session_state.current_file_id:
             # Get detailed information about current file
-            for file in recent_files:
-                if file['file_id'] == st.session_state.current_file_id:
-                    current_file_info = file
-                    break
+            current_file_info = files_by_id.get(st.session_state.current_file_id)
             
             if current_file_info:
                 col1, col2, col3 = st.columns([2, 1, 1])
@@ -617,11 +1026,9 @@ class ContractAssistantApp:
                 with col2:
                     st.info(f"Pages: {current_file_info['num_pages']}")
                 with col3:
-                    if st.button("🔄 Switch File"):
-                        st.session_state.current_file_id = None
-                        st.session_state.messages = []  # Clear chat history
+                    if st.button("🔄 Switch File", disabled=st.session_state.processing_job is not None):
                         # ⭐ Key modification 8: Clean RAG system when switching files
-                        st.session_state.rag_system.clear_all_documents()
+                        self._reset_active_document()
                         st.rerun()
             else:
                 st.info(f"Current file ID: {st.session_state.current_file_id}")
@@ -629,442 +1036,444 @@ class ContractAssistantApp:
             st.warning("📂 Please select or upload a file from the left sidebar")
         
         # Create tabs for different functions
+        # Each tab body is a fragment: its widgets rerun only that tab, not the whole app
         tab1, tab2, tab3, tab4, tab5 = st.tabs([
             "📤 Upload", "💬 Q&A", "📝 Summary", "🔍 Extract Info", "⚖️ Compare"
         ])
         
-        # Tab1: Upload
         with tab1:
-            st.markdown("<div class='upload-section'>", unsafe_allow_html=True)
-            uploaded_file = st.file_uploader("Upload Contract (PDF)", type=['pdf'])
-            
-            if uploaded_file:
-                if st.button("Start Processing"):
-                    with st.spinner("Processing file..."):
-                        result = self.file_processor.process_and_save_file(
-                            st.session_state.user_id,
-                            uploaded_file,
-                            st.session_state.rag_system
-                        )
-                        
-                        if result["success"]:
-                            st.session_state.current_file_id = result["file_id"]
-                            # ⭐ Key modification 9: Clear chat history when uploading new file
-                            st.session_state.messages = []
-                            st.success("File processed successfully!")
-                            
-                            # Display processing information
-                            stats = result.get("stats", {})
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.metric("Total pages", stats.get("pages", 0))
-                            with col2:
-                                st.metric("Total chunks", stats.get("chunks", 0))
-                            with col3:
-                                st.metric("File size", f"{stats.get('characters', 0):,}")
-                        else:
-                            st.error(result.get("error", "Processing failed"))
-            st.markdown("</div>", unsafe_allow_html=True)
-        
-        # Tab2: Q&A
+            self._render_upload_tab()
+            if st.session_state.processing_job is not None:
+                self._render_processing_job()
         with tab2:
-            if not st.session_state.current_file_id:
-                st.warning("Please upload or load a file first")
-            else:
-                # Inject CSS for quick questions
-                st.markdown(QUICK_QUESTION_CSS, unsafe_allow_html=True)
-                st.markdown("<div class='qa-hero-layer'></div><div class='qa-content-wrap'>", unsafe_allow_html=True)
+            self._render_qa_tab(current_file_info)
+        with tab3:
+            self._render_summary_tab()
+        with tab4:
+            self._render_extract_tab()
+        with tab5:
+            self._render_compare_tab(files_by_id)
+        st.markdown(_MAIN_APP_CLOSER, unsafe_allow_html=True)
+    
+    @st.fragment
+    def _render_sidebar(self, all_files: List[Dict]):
+        """Sidebar: profile, logout and recent files"""
+        username_display = st.session_state.username or "Guest"
+        role_display = "🏡 Tenant" if st.session_state.get('user_role') == 'tenant' else ("🏢 Landlord" if st.session_state.get('user_role') == 'landlord' else "Unknown")
+        avatar_text = (username_display[:1].upper() if isinstance(username_display, str) and len(username_display) > 0 else "?")
+        st.markdown(_build_html(
+            "<div class='profile-card'><div class='profile-avatar'>", avatar_text,
+            "</div><div class='profile-name'>", username_display,
+            "</div><div class='profile-role'>", role_display, "</div></div>",
+        ), unsafe_allow_html=True)
+        
+        # Disabled while an upload is processed: the worker thread is still rebuilding this session's RAG system
+        if st.button("Logout", disabled=st.session_state.processing_job is not None):
+            # ⭐ Key modification 6: Clean up RAG system on logout
+            self._reset_active_document()
+            st.session_state.clear()
+            st.rerun()
+        
+        st.divider()
+        
+        # Display recent files
+        st.subheader("📁 Recent Files")
+        recent_files = all_files[:5]
+        
+        if recent_files:
+            # One static list plus a single selectbox/button pair instead of columns and buttons per file
+            st.markdown("\n".join(
+                f"- 📄 **{file['filename'][:20]}...**  \n"
+                f"  Pages: {file['num_pages']} · Chunks: {file['num_chunks']} · Uploaded: {file['upload_time']}"
+                for file in recent_files
+            ))
+            recent_by_id = {file['file_id']: file for file in recent_files}
+            selected_id = st.selectbox(
+                "Select a file",
+                options=list(recent_by_id),
+                format_func=lambda fid: recent_by_id[fid]['filename'],
+                label_visibility="collapsed"
+            )
+            # The RAG system is busy while an upload is processed in the background
+            if st.button("Load", use_container_width=True, disabled=st.session_state.processing_job is not None):
+                if self.file_processor.load_processed_file(
+                    st.session_state.user_id,
+                    selected_id,
+                    self.init_user_rag_system()
+                ):
+                    st.session_state.current_file_id = selected_id
+                    st.session_state.docs_loaded = True
+                    # ⭐ Key modification 7: Clear chat history when switching files
+                    st.session_state.messages = []
+                    bump_files_version(st.session_state.user_id)  # last_accessed changed the order
+                    st.success("File loaded")
+                    st.rerun()
+                else:
+                    # load_processed_file clears the RAG system before loading
+                    st.session_state.docs_loaded = False
+        else:
+            st.info("No files uploaded yet")
+    
+    @st.fragment
+    def _render_upload_tab(self):
+        """Tab1: Upload"""
+        st.markdown("<div class='upload-section'>", unsafe_allow_html=True)
+        uploaded_file = st.file_uploader("Upload Contract (PDF)", type=['pdf'])
+        
+        job = st.session_state.processing_job
+        if uploaded_file and job is None:
+            if st.button("Start Processing"):
+                # Parsing and embedding run on a worker thread; the page stays responsive meanwhile.
+                # The job clears and rebuilds the RAG system, so the previous contract is unloaded first
+                # (Q&A, summary and extraction must not run against the half-built index).
+                self._reset_active_document()
+                st.session_state.processing_job = self.file_processor.start_processing_job(
+                    st.session_state.user_id,
+                    uploaded_file,
+                    self.init_user_rag_system()
+                )
+                st.rerun()
+        
+        error = st.session_state.pop('upload_error', None)
+        if error:
+            st.error(error)
+        
+        # Display processing information (once, after the rerun triggered by a successful upload)
+        stats = st.session_state.pop('upload_stats', None)
+        if stats is not None:
+            st.success("File processed successfully!")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total pages", stats.get("pages", 0))
+            with col2:
+                st.metric("Total chunks", stats.get("chunks", 0))
+            with col3:
+                st.metric("File size", f"{stats.get('characters', 0):,}")
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    @st.fragment(run_every=0.5)
+    def _render_processing_job(self):
+        """Poll the background upload job; on completion hand its result to a full rerun."""
+        job = st.session_state.processing_job
+        if job is None:
+            return
+        if job.status == "running":
+            st.info(f"⏳ Processing {job.filename}: {job.stage}...")
+            if st.button("Cancel", disabled=job.cancel_requested):
+                job.cancel_requested = True
+            return
+        
+        st.session_state.processing_job = None
+        result = job.result or {}
+        if job.status == "done":
+            st.session_state.current_file_id = result["file_id"]
+            st.session_state.docs_loaded = True
+            # ⭐ Key modification 9: Clear chat history when uploading new file
+            st.session_state.messages = []
+            bump_files_version(st.session_state.user_id)
+            st.session_state.upload_stats = result.get("stats", {})
+            self._precompute_quick_answers(result["file_id"])
+        elif job.status == "failed":
+            # process_and_save_file clears the RAG system before loading
+            st.session_state.upload_error = result.get("error", "Processing failed")
+        st.rerun()  # Full rerun so the sidebar and file bar pick up the new file
+    
+    @st.fragment
+    def _render_qa_tab(self, current_file_info: Optional[Dict]):
+        """Tab2: Q&A"""
+        if not st.session_state.current_file_id:
+            st.warning("Please upload or load a file first")
+        else:
+            # Inject CSS for quick questions
+            inject_css(QUICK_QUESTION_CSS)
+            st.markdown("<div class='qa-hero-layer'></div><div class='qa-content-wrap'>", unsafe_allow_html=True)
+            
+            # ⭐ New: Display current contract information in use
+            if current_file_info:
+                st.info(f"🎯 Current Q&A for contract: **{current_file_info['filename']}**")
+            
+            # 快捷提问气泡 - 始终显示，使用expander
+            with st.expander("💡 Quick Questions - Click to expand", expanded=not bool(st.session_state.messages)):
+                st.caption("Click a question below to get instant answers:")
                 
-                # ⭐ New: Display current contract information in use
-                if current_file_info:
-                    st.info(f"🎯 Current Q&A for contract: **{current_file_info['filename']}**")
+                # 根据用户角色显示不同的问题
+                question_icons, question_labels, quick_questions = zip(*quick_questions_for(st.session_state.user_role))
                 
-                # 快捷提问气泡 - 始终显示，使用expander
-                with st.expander("💡 Quick Questions - Click to expand", expanded=not bool(st.session_state.messages)):
-                    st.caption("Click a question below to get instant answers:")
-                    
-                    # 根据用户角色显示不同的问题
-                    if st.session_state.user_role == 'tenant':
-                        # 租客问题
-                        quick_questions = [
-                            "What is the monthly rent amount?",
-                            "What is the lease duration?",
-                            "What is the security deposit amount?",
-                            "When is the rent due each month?",
-                            "What are my maintenance responsibilities?",
-                            "What is the pet policy?",
-                            "What are the termination conditions?",
-                            "Who pays for utilities?"
-                        ]
-                        question_icons = ["💰", "📅", "🏦", "📆", "🔧", "🐕", "🚪", "💡"]
-                        question_labels = [
-                            "Monthly Rent",
-                            "Lease Duration",
-                            "Security Deposit",
-                            "Payment Due",
-                            "Maintenance",
-                            "Pet Policy",
-                            "Termination",
-                            "Utilities"
-                        ]
-                    else:  # landlord
-                        # 房东问题
-                        quick_questions = [
-                            "What are the tenant's payment obligations?",
-                            "What are the late payment penalties?",
-                            "What are my maintenance obligations as landlord?",
-                            "What are the property access rights?",
-                            "What are the lease renewal terms?",
-                            "What are the tenant's restrictions?",
-                            "What are the eviction conditions?",
-                            "What are my liability protections?"
-                        ]
-                        question_icons = ["💵", "⚠️", "🏗️", "🔑", "🔄", "⛔", "📋", "🛡️"]
-                        question_labels = [
-                            "Payment Terms",
-                            "Late Penalties",
-                            "Maintenance",
-                            "Access Rights",
-                            "Renewal Terms",
-                            "Restrictions",
-                            "Eviction",
-                            "Liability"
-                        ]
-                    
-                    # 使用列布局显示问题按钮
-                    cols = st.columns(4)
-                    for idx, (icon, label, question) in enumerate(zip(question_icons, question_labels, quick_questions)):
-                        col_idx = idx % 4
-                        with cols[col_idx]:
-                            # 创建按钮标签：emoji + 简短文字
-                            button_label = f"{icon} {label}"
-                            if st.button(button_label, key=f"quick_q_{idx}", use_container_width=True, help=question):
-                                # 模拟用户点击，设置问题
-                                st.session_state.pending_question = question
-                                st.rerun()
-                    
-                    # 显示问题文本（用于用户查看）
-                    with st.expander("📝 View all quick questions", expanded=False):
-                        for icon, label, question in zip(question_icons, question_labels, quick_questions):
-                            st.markdown(f"**{icon} {label}**: {question}")
-                    
-                    st.divider()
+                # 后台预计算快捷问题的查询向量，点击后直接命中缓存
+                self._prefetch_question_embeddings(quick_questions)
                 
-                # 处理待处理的问题（从快捷按钮点击）- 优化：立即处理，无需额外rerun
-                if 'pending_question' in st.session_state and st.session_state.pending_question:
-                    prompt = st.session_state.pending_question
-                    st.session_state.pending_question = None  # 清除待处理问题
-                    
-                    # 添加用户问题到历史
-                    st.session_state.messages.append({"role": "user", "content": prompt})
+                # 已有问题在本轮作答（快捷问题或聊天输入）时禁用按钮，避免连点叠加多次LLM调用
+                qa_busy = bool(st.session_state.pending_question or st.session_state.get('qa_prompt'))
+                
+                # 使用列布局显示问题按钮
+                cols = st.columns(4)
+                for idx, (icon, label, question) in enumerate(zip(question_icons, question_labels, quick_questions)):
+                    col_idx = idx % 4
+                    with cols[col_idx]:
+                        # 创建按钮标签：emoji + 简短文字
+                        button_label = f"{icon} {label}"
+                        # 回调在本轮运行前设置问题，下方聊天区本轮直接作答，无需额外rerun
+                        st.button(button_label, key=f"quick_q_{idx}", use_container_width=True, help=question,
+                                  disabled=qa_busy, on_click=_queue_quick_question, args=(question,))
+                
+                # 显示问题文本（用于用户查看）
+                with st.expander("📝 View all quick questions", expanded=False):
+                    for icon, label, question in zip(question_icons, question_labels, quick_questions):
+                        st.markdown(f"**{icon} {label}**: {question}")
+                
+                st.divider()
+            
+            """ # ⭐ 新增: 显示当前RAG系统加载的文档信息(调试用)
+            if st.checkbox("🔍 system debugging", value=False):
+                try:
+                    rag_info = st.session_state.rag_system.get_current_documents_info()
+                    st.code(rag_info)
                     
-                    # 获取AI回答
+                    # Display processing information信息
+                    stats = st.session_state.rag_system.get_statistics()
+                    st.json(stats)
+                except Exception as e:
+                    st.error(f"无法获取系统状态: {e}") """
+            
+            # Chat interface - Display chat history
+            self._render_chat_history()
+            
+            # Chat input
+            # Add disclaimer below the chat input
+            st.caption("AI can make mistakes. Please verify important information.")
+            
+            prompt = st.chat_input("Ask a question about the contract...", key='qa_prompt')
+            # A quick question button click is answered here as well, streamed below the history
+            if not prompt and st.session_state.pending_question:
+                prompt = st.session_state.pending_question
+                st.session_state.pending_question = None
+            if prompt:
+                # ⭐ Key modification 10: Validate document status before answering (session flag, no RAG probe)
+                if not st.session_state.docs_loaded:
+                    st.error("❌ System error: No documents loaded, please reload the contract")
+                    st.stop()
+                
+                # Display user question immediately
+                self._append_message({"role": "user", "content": prompt})
+                with st.chat_message("user"):
+                    st.write(prompt)
+                
+                # Display assistant thinking
+                with st.chat_message("assistant"):
                     with st.spinner("🤔 Thinking..."):
-                        response = st.session_state.rag_system.ask_question(prompt)
+                        # Answer (semantic cache first, otherwise streamed as it is generated) and save to history
+                        response = self.answer_question(prompt, stream=True)
                         
-                        # 保存到历史
-                        self.cache_manager.save_qa_history(
-                            st.session_state.user_id,
-                            st.session_state.current_file_id,
-                            prompt,
-                            response["answer"],
-                            response.get("sources", [])
-                        )
+                        # Display answer
+                        if not response.get("streamed"):
+                            st.write(response["answer"])
+                        if response.get("cached"):
+                            st.caption("⚡ Answered from a similar earlier question")
                         
-                        # 保存助手回答到历史
-                        st.session_state.messages.append({
+                        # Display sources (static Markdown previews, reused when the history is redrawn)
+                        sources = compact_sources(response.get("sources", []), response.get("qa_id"))
+                        sources_md = sources_markdown(sources) if sources else ""
+                        if sources_md:
+                            with st.expander("📚 Reference Sources", expanded=True):
+                                st.markdown(sources_md)
+                        #------
+                        # Save assistant message to history
+                        self._append_message({
                             "role": "assistant",
                             "content": response["answer"],
-                            "sources": response.get("sources", [])
+                            "sources": sources,
+                            "sources_md": sources_md
                         })
-                    
-                    st.rerun()  # 重新加载以显示对话
-                
+                # The quick buttons above were drawn disabled for this answer; redraw them enabled
+                _rerun_fragment()
+            
+            # Clear chat history button
+            col1, col2 = st.columns([1, 4])
+            with col1:
+                if st.button("🗑️ Clear Chat"):
+                    st.session_state.messages = []
+                    st.session_state.chat_window = CHAT_WINDOW_SIZE
+                    # ⭐ Key modification 11: Also clear RAG system's memory
+                    if hasattr(st.session_state.rag_system, 'memory'):
+                        st.session_state.rag_system.memory.clear()
+                    st.rerun()
+            st.markdown("</div>", unsafe_allow_html=True)
+    
+    def _render_chat_history(self):
+        """Chat history of the Q&A tab.
+        
+        Runs inside the Q&A tab fragment rather than as a nested fragment: the answer to a new
+        question is drawn inline below it, and a history-only rerun would then show that turn twice.
+        """
+        # Past sources are static Markdown (rendered once per message) instead of text_area widgets
+        # Only the last chat_window messages are rendered; older ones keep their text only
+        # (their sources remain in the SQLite Q&A history)
+        messages = st.session_state.messages
+        start = max(0, len(messages) - st.session_state.chat_window)
+        if start > 0:
+            for message in messages[:start]:
+                message.pop("sources", None)
+                message.pop("sources_md", None)
+            st.button(f"⬆️ Load {min(start, CHAT_WINDOW_SIZE)} older messages ({start} hidden)",
+                      on_click=_show_older_messages)
+        for message in messages[start:]:
+            with st.chat_message(message["role"]):
+                # 转义$符号以防止LaTeX渲染（追加消息时已转义一次）
+                content = message.get("content_rendered")
+                if content is None:
+                    content = message["content_rendered"] = escape_dollars(message["content"])
+                st.markdown(content)
+                # Display sources if available
+                if message.get("sources"):
+                    if "sources_md" not in message:
+                        message["sources_md"] = sources_markdown(message["sources"])
+                    with st.expander("📚 Reference Sources"):
+                        st.markdown(message["sources_md"])
+                        # Full text of long sources is read from the Q&A history only when asked for
+                        for i, source in enumerate(message["sources"], 1):
+                            ref = source.get("content_ref")
+                            length = f" ({source['length']:,} chars)" if "length" in source else ""
+                            if ref and st.button(f"🔍 View full content of Source {i}{length}", key=f"full_source_{ref[0]}_{ref[1]}"):
+                                st.code(self.cache_manager.get_source_content(*ref) or "", language=None)
+    
+    @st.fragment
+    def _render_summary_tab(self):
+        """Tab3: Summary"""
+        if not st.session_state.current_file_id:
+            st.warning("Please upload or load a file first")
+        else:
+            summary_type = st.selectbox(
+                "Summary Type",
+                ["brief", "comprehensive", "key points"],
+                format_func=lambda x: x.title()  # 首字母大写显示
+            )
+            
+            summary_key = (st.session_state.current_file_id, summary_type)
+            
+            if st.button("Generate Summary"):
+                # Check cache first
+                cached = cached_summary(
+                    self.cache_manager,
+                    st.session_state.current_file_id,
+                    summary_type,
+                    st.session_state.results_version
+                )
                 
-                """ # ⭐ 新增: 显示当前RAG系统加载的文档信息(调试用)
-                if st.checkbox("🔍 system debugging", value=False):
-                    try:
-                        rag_info = st.session_state.rag_system.get_current_documents_info()
-                        st.code(rag_info)
+                if cached:
+                    st.success("Using cached summary")
+                    st.session_state.summaries[summary_key] = cached
+                else:
+                    with st.spinner("Generating summary..."):
+                        summary = st.session_state.rag_system.summarize_contract(
+                            summary_type=summary_type
+                        )
                         
-                        # Display processing information信息
-                        stats = st.session_state.rag_system.get_statistics()
-                        st.json(stats)
-                    except Exception as e:
-                        st.error(f"无法获取系统状态: {e}") """
-                
-                # Chat interface - Display chat history
-                for msg_idx, message in enumerate(st.session_state.messages):
-                    with st.chat_message(message["role"]):
-                        # 转义$符号以防止LaTeX渲染
-                        content = message["content"].replace("$", "\\$")
-                        st.markdown(content)
-                        # Display sources if available (same format as new messages)
-                        if message.get("sources"):
-                            with st.expander("📚 Reference Sources"):
-                                for i, source in enumerate(message["sources"], 1):
-                                    page_number = source.get('page', 'N/A')
-                                    if page_number is not None and isinstance(page_number, int):
-                                        page_number += 1  # Change page numbering from 0 to 1-based
-                                    else:
-                                        page_number = 'N/A'
-                                    st.markdown(f"**📄 Source {i} - Page {page_number}**")
-                                    
-                                    content = source.get('content', '')
-                                    
-                                    # Display preview (first 300 characters)
-                                    preview_length = 300
-                                    if len(content) <= preview_length:
-                                        st.text_area(
-                                            f"Source content",
-                                            content,
-                                            height=100,
-                                            key=f"hist_src_{msg_idx}_{i}",
-                                            label_visibility="collapsed"
-                                        )
-                                    else:
-                                        # Display preview with expand option
-                                        st.text_area(
-                                            f"Source preview",
-                                            content[:preview_length] + "...",
-                                            height=100,
-                                            key=f"hist_prev_{msg_idx}_{i}",
-                                            label_visibility="collapsed"
-                                        )
-                                        
-                                        with st.expander(f"🔍 View Full Content ({len(content)} characters)"):
-                                            st.text_area(
-                                                f"Full content",
-                                                content,
-                                                height=300,
-                                                key=f"hist_full_{msg_idx}_{i}",
-                                                label_visibility="collapsed"
-                                            )
-                                    
-                                    if i < len(message["sources"]):
-                                        st.divider()
-                
-                # Chat input
-                # Add disclaimer below the chat input
-                st.caption("AI can make mistakes. Please verify important information.")
+                        # Save to cache
+                        self.cache_manager.save_summary(
+                            st.session_state.current_file_id,
+                            st.session_state.user_id,
+                            summary_type,
+                            summary
+                        )
+                        st.session_state.results_version += 1
+                        st.session_state.summaries[summary_key] = summary
+            
+            # Redraw the last summary from session memory on later reruns
+            if summary_key in st.session_state.summaries:
+                safe_markdown(st.session_state.summaries[summary_key])
+    
+    @st.fragment
+    def _render_extract_tab(self):
+        """Tab4: Extract Info"""
+        if not st.session_state.current_file_id:
+            st.warning("Please upload or load a file first")
+        else:
+            if st.button("Extract Key Information"):
+                # Check cache
+                cached = cached_extraction(
+                    self.cache_manager,
+                    st.session_state.current_file_id,
+                    st.session_state.results_version
+                )
                 
-                if prompt := st.chat_input("Ask a question about the contract..."):
-                    # ⭐ Key modification 10: Validate document status before answering
-                    try:
-                        current_docs = st.session_state.rag_system.get_current_documents_info()
-                        if not current_docs or current_docs == "No documents loaded":
-                            st.error("❌ System error: No documents loaded, please reload the contract")
-                            st.stop()
-                    except Exception as e:
-                        st.error(f"❌ Document validation failed: {e}")
-                        st.stop()
-                    
-                    # Display user question immediately
-                    st.session_state.messages.append({"role": "user", "content": prompt})
-                    with st.chat_message("user"):
-                        st.write(prompt)
-                    
-                    # Display assistant thinking
-                    with st.chat_message("assistant"):
-                        with st.spinner("🤔 Thinking..."):
-                            response = st.session_state.rag_system.ask_question(prompt)
-                            
-                            # Save to history
-                            self.cache_manager.save_qa_history(
-                                st.session_state.user_id,
-                                st.session_state.current_file_id,
-                                prompt,
-                                response["answer"],
-                                response.get("sources", [])
-                            )
-                            
-                            # Display answer
-                            st.write(response["answer"])
-                            
-                            # Display sources
-                            if response.get("sources"):
-                                with st.expander("📚 Reference Sources", expanded=True):
-                                    for i, source in enumerate(response["sources"], 1):
-                                        page_number = source.get('page', 'N/A')
-                                        if page_number is not None and isinstance(page_number, int):
-                                            page_number += 1  # Change page numbering from 0 to 1-based
-                                        else:
-                                            page_number = 'N/A'
-                                        st.markdown(f"**📄 Source {i} - Page {page_number}**")
-                                        
-                                        content = source.get('content', '')
-                                        
-                                        # Display preview (first 500 characters)
-                                        preview_length = 500
-                                        if len(content) <= preview_length:
-                                            st.text_area(
-                                                f"Source content_{i}",
-                                                content,
-                                                height=150,
-                                                key=f"new_source_preview_{len(st.session_state.messages)}_{i}",  # ← Add message count
-                                                label_visibility="collapsed"
-                                            )
-                                        else:
-                                            # Display preview
-                                            st.text_area(
-                                                f"Source content preview_{i}",
-                                                content[:preview_length] + "...",
-                                                height=150,
-                                                key=f"new_source_preview_long_{len(st.session_state.messages)}_{i}",  # ← Unique key
-                                                label_visibility="collapsed"
-                                            )
-                                            # Provide option to view full content
-                                            with st.expander(f"🔍 View full content ({len(content)} Characters)"):
-                                                st.text_area(
-                                                        f"Full content_{i}",
-                                                        content,
-                                                        height=300,
-                                                        key=f"new_source_full_{len(st.session_state.messages)}_{i}",  # ← Unique key
-                                                        label_visibility="collapsed"
-                                                    )
-                                        
-                                        if i < len(response["sources"]):
-                                            st.divider()
-                            #------
-                            # Save assistant message to history
-                            st.session_state.messages.append({
-                                "role": "assistant",
-                                "content": response["answer"],
-                                "sources": response.get("sources", [])
-                            })
+                if cached:
+                    st.success("Using cached extraction results")
+                    key_info = cached
+                else:
+                    with st.spinner("Extracting..."):
+                        key_info = st.session_state.rag_system.extract_key_information_parallel()
+                        
+                        # Save to cache
+                        self.cache_manager.save_extraction(
+                            st.session_state.current_file_id,
+                            st.session_state.user_id,
+                            key_info
+                        )
+                        st.session_state.results_version += 1
                 
-                # Clear chat history button
-                col1, col2 = st.columns([1, 4])
-                with col1:
-                    if st.button("🗑️ Clear Chat"):
-                        st.session_state.messages = []
-                        # ⭐ Key modification 11: Also clear RAG system's memory
-                        if hasattr(st.session_state.rag_system, 'memory'):
-                            st.session_state.rag_system.memory.clear()
-                        st.rerun()
-                st.markdown("</div>", unsafe_allow_html=True)
-        
-        # Tab3: Summary
-        with tab3:
-            if not st.session_state.current_file_id:
-                st.warning("Please upload or load a file first")
-            else:
-                summary_type = st.selectbox(
-                    "Summary Type",
-                    ["brief", "comprehensive", "key points"],
-                    format_func=lambda x: x.title()  # 首字母大写显示
+                st.session_state.extractions[st.session_state.current_file_id] = key_info
+            
+            # Redraw the last extraction from session memory on later reruns
+            key_info = st.session_state.extractions.get(st.session_state.current_file_id)
+            if key_info:
+                # Display results (plain records; no intermediate DataFrame)
+                rows = [
+                    {"No.": idx, "Keyword": k, "Details": v} for idx, (k, v) in enumerate(key_info.items(), 1)
+                ]
+                st.dataframe(
+                    rows, 
+                    use_container_width=True, 
+                    hide_index=True,
+                    column_config={
+                        "No.": st.column_config.NumberColumn(
+                            "No.",
+                            width=50  # 自定义宽度，更小
+                        ),
+                        "Keyword": st.column_config.TextColumn(
+                            "Keyword",
+                            width="medium"
+                        ),
+                        "Details": st.column_config.TextColumn(
+                            "Details",
+                            width="large"
+                        )
+                    }
                 )
-                
-                if st.button("Generate Summary"):
-                    # Check cache first
-                    cached = self.cache_manager.get_cached_summary(
-                        st.session_state.current_file_id,
-                        summary_type
-                    )
-                    
-                    if cached:
-                        st.success("Using cached summary")
-                        st.write(cached)
-                    else:
-                        with st.spinner("Generating summary..."):
-                            summary = st.session_state.rag_system.summarize_contract(
-                                summary_type=summary_type
-                            )
-                            
-                            # Save to cache
-                            self.cache_manager.save_summary(
-                                st.session_state.current_file_id,
-                                st.session_state.user_id,
-                                summary_type,
-                                summary
-                            )
-                            
-                            safe_markdown(summary)
-
-        
-        # Tab4: Extract Info
-        with tab4:
-            if not st.session_state.current_file_id:
-                st.warning("Please upload or load a file first")
-            else:
-                if st.button("Extract Key Information"):
-                    # Check cache
-                    cached = self.cache_manager.get_cached_extraction(
-                        st.session_state.current_file_id
-                    )
-                    
-                    if cached:
-                        st.success("Using cached extraction results")
-                        key_info = cached
-                    else:
-                        with st.spinner("Extracting..."):
-                            key_info = st.session_state.rag_system.extract_key_information_parallel()
-                            
-                            # Save to cache
-                            self.cache_manager.save_extraction(
-                                st.session_state.current_file_id,
-                                st.session_state.user_id,
-                                key_info
-                            )
-                    
-                    # Display results
-                    df = pd.DataFrame([
-                        {"No.": idx + 1, "Keyword": k, "Details": v} for idx, (k, v) in enumerate(key_info.items())
-                    ])
-                    st.dataframe(
-                        df, 
-                        use_container_width=True, 
-                        hide_index=True,
-                        column_config={
-                            "No.": st.column_config.NumberColumn(
-                                "No.",
-                                width=50  # 自定义宽度，更小
-                            ),
-                            "Keyword": st.column_config.TextColumn(
-                                "Keyword",
-                                width="medium"
-                            ),
-                            "Details": st.column_config.TextColumn(
-                                "Details",
-                                width="large"
-                            )
-                        }
-                    )
+    
+    @st.fragment
+    def _render_compare_tab(self, files_by_id: Dict[str, Dict]):
+        """Tab5: Compare (simplified version)"""
+        st.info("Load two files to compare")
         
-        # Tab5: Compare (simplified version)
-        with tab5:
-            st.info("Load two files to compare")
+        # All processed files (fetched once in main_app)
+        if len(files_by_id) < 2:
+            st.warning("At least 2 files are required for comparison")
+        else:
+            col1, col2 = st.columns(2)
             
-            # Get all processed files
-            all_files = self.file_processor.get_recent_files(st.session_state.user_id, limit=20)
+            # Options are the ids of the shared files_by_id dict; names are looked up only for display
+            def filename_of(fid):
+                return files_by_id[fid]['filename']
             
-            if len(all_files) < 2:
-                st.warning("At least 2 files are required for comparison")
-            else:
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    file1_options = {f['file_id']: f['filename'] for f in all_files}
-                    file1_id = st.selectbox("Select File 1", options=list(file1_options.keys()), 
-                                           format_func=lambda x: file1_options[x])
-                
-                with col2:
-                    file2_options = {f['file_id']: f['filename'] for f in all_files if f['file_id'] != file1_id}
-                    if file2_options:
-                        file2_id = st.selectbox("Select File 2", options=list(file2_options.keys()), 
-                                               format_func=lambda x: file2_options[x])
-                    else:
-                        st.warning("Please select different files")
-                        file2_id = None
-                
-                if file1_id and file2_id and st.button("Start Comparison"):
-                    st.info("Comparison feature under development... Need to load two contracts for analysis")
-        st.markdown("</div>", unsafe_allow_html=True)
-        st.markdown("<div style='text-align:center;color:#9aa1a9;font-size:.95rem;margin-top:8px;'>© 2025 RentalPeace. All rights reserved.</div>", unsafe_allow_html=True)
+            with col1:
+                file1_id = st.selectbox("Select File 1", options=list(files_by_id), 
+                                       format_func=filename_of)
+            
+            with col2:
+                file2_options = [fid for fid in files_by_id if fid != file1_id]
+                if file2_options:
+                    file2_id = st.selectbox("Select File 2", options=file2_options, 
+                                           format_func=filename_of)
+                else:
+                    st.warning("Please select different files")
+                    file2_id = None
+            
+            if file1_id and file2_id and st.button("Start Comparison"):
+                st.info("Comparison feature under development... Need to load two contracts for analysis")
     
     def run(self):
         """Run application"""
-        st.set_page_config(page_title="Contract Assistant", page_icon="📄", layout="wide")
+        _ensure_page_config(page_title="Contract Assistant", page_icon="📄", layout="wide")
         
         # Handle page routing from URL parameters
         params = dict(st.query_params)
@@ -5,18 +5,25 @@
 """
 
 import os
-from typing import List, Dict, Optional, Tuple
+import re
+import unicodedata
+from typing import Iterator, List, Dict, Optional, Tuple
 import hashlib
 import pickle
 from datetime import datetime
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 # LangChain核心组件
 from langchain_community.document_loaders.pdf import PyMuPDFLoader, PDFPlumberLoader
+from langchain_community.document_loaders.parsers.pdf import PyMuPDFParser, PDFPlumberParser
+from langchain_community.document_loaders.blob_loaders import Blob
 # 如只用其一，也可只留一个
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.embeddings import OpenAIEmbeddings
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
 from langchain.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
 from langchain.chains import (
     RetrievalQA, 
     ConversationalRetrievalChain,
@@ -32,13 +39,116 @@ from langchain.retrievers.contextual_compression import ContextualCompressionRet
 
 from langchain.retrievers.document_compressors import LLMChainExtractor
 from langchain.callbacks import get_openai_callback
+from langchain.chains.conversational_retrieval.base import _get_chat_history
+from langchain.chains.conversational_retrieval.prompts import CONDENSE_QUESTION_PROMPT
+from langchain.chains.question_answering.stuff_prompt import PROMPT_SELECTOR
 
 # 工具类
 import numpy as np
+import faiss
 from pathlib import Path
 import json
 from dotenv import load_dotenv
 load_dotenv()
+
+# 设置代理（如果需要）：进程启动时设置一次，保证之后创建的所有OpenAI客户端（包括共享客户端）都能使用
+_proxies = os.getenv("HTTPS_PROXY") or os.getenv("HTTP_PROXY")
+if _proxies:
+    # 对于需要代理的情况，可以设置环境变量
+    os.environ["OPENAI_PROXY"] = _proxies
+
+# 非加密快速哈希（可选），用于进程内缓存键；未安装时回退到 hashlib
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# 与合同无关问题的预过滤：只拦截寒暄类短语
+# （不用与文档中心向量的相似度判断：ada-002 等模型中几乎任意两段英文的余弦相似度都在0.7以上，固定阈值无法区分）
+SMALL_TALK_PATTERN = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|thx|ok|okay|bye|good (morning|afternoon|evening))[\s!.?]*$",
+    re.IGNORECASE
+)
+
+# 信息提取回填时同时进行的 LLM 调用上限
+EXTRACTION_MAX_WORKERS = 5
+
+# 文档块向量每个请求的文本数；超过一批时多个请求并发发送
+EMBED_BATCH_SIZE = 256
+EMBED_MAX_WORKERS = 4
+
+# 文档块数不少于该值时，向量索引改用 8 bit 标量量化（内存约为 float32 的 1/4，检索结果基本不变）
+QUANTIZE_MIN_CHUNKS = 64
+
+
+class QueryCachedEmbeddings(Embeddings):
+    """
+    带查询向量缓存的Embeddings包装器
+    - embed_query 命中缓存时不再请求API
+    - prewarm 可一次性批量计算多个查询的向量
+    - 设置 document_store 后，文档块向量按内容哈希持久化，重复上传/加载同一合同无需重新计算
+    """
+
+    def __init__(self, base: Embeddings, max_size: int = 1024):
+        self.base = base
+        self.max_size = max_size
+        self.query_cache: Dict[str, List[float]] = {}
+        # 文档向量存储，需提供 get_many(model, hashes) -> {hash: vector} 和 put_many(model, {hash: vector})
+        self.document_store = None
+        self.model_name = getattr(base, "model", type(base).__name__)
+
+    def _store(self, text: str, vector: List[float]):
+        if len(self.query_cache) >= self.max_size:
+            # 淘汰最早加入的向量（实例可被同一用户的多个会话共享，并发淘汰时键可能已不存在）
+            self.query_cache.pop(next(iter(self.query_cache)), None)
+        self.query_cache[text] = vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.document_store is None or not texts:
+            return self._embed_batched(texts)
+
+        hashes = [hashlib.sha256(t.encode("utf-8")).hexdigest() for t in texts]
+        cached = self.document_store.get_many(self.model_name, list(set(hashes)))
+
+        # 只为未缓存的文本发起一次批量请求
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = text
+        if missing:
+            vectors = self._embed_batched(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), vectors))
+            self.document_store.put_many(self.model_name, new_vectors)
+            cached.update(new_vectors)
+            print(f"🧮 Embedded {len(missing)} new chunks ({len(texts) - len(missing)} from cache)")
+
+        return [cached[h] for h in hashes]
+
+    def _embed_batched(self, texts: List[str]) -> List[List[float]]:
+        """按 EMBED_BATCH_SIZE 分批请求，多批时并发发送以重叠网络往返，结果保持原顺序"""
+        batches = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+        if len(batches) <= 1:
+            return self.base.embed_documents(texts)
+        with ThreadPoolExecutor(max_workers=min(len(batches), EMBED_MAX_WORKERS)) as executor:
+            return [vector for batch in executor.map(self.base.embed_documents, batches) for vector in batch]
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.query_cache.get(text)
+        if vector is None:
+            vector = self.base.embed_query(text)
+            self._store(text, vector)
+        return vector
+
+    def prewarm(self, texts: List[str]) -> int:
+        """批量预计算查询向量，返回新计算的数量"""
+        missing = list(dict.fromkeys(t for t in texts if t not in self.query_cache))
+        if missing:
+            for text, vector in zip(missing, self.base.embed_documents(missing)):
+                self._store(text, vector)
+        return len(missing)
+
+
 class AdvancedContractRAG:
     """
     高级合同RAG系统
@@ -51,7 +161,9 @@ class AdvancedContractRAG:
     - 多语言支持
     """
     
-    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", language: str = "en"):
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", language: str = "en",
+                 llm: Optional[ChatOpenAI] = None, base_embeddings: Optional[Embeddings] = None,
+                 embeddings: Optional[QueryCachedEmbeddings] = None):
         """
         初始化高级RAG系统
         
@@ -59,30 +171,21 @@ class AdvancedContractRAG:
             api_key: OpenAI API密钥
             model: 使用的模型 (gpt-3.5-turbo, gpt-4等)
             language: 语言设置 (en, zh等)
+            llm: 可选的共享LLM客户端（多个会话复用同一连接池）；None则新建
+            base_embeddings: 可选的共享Embeddings客户端；None则新建
+            embeddings: 可选的共享查询向量缓存（如同一用户的多个会话复用）；None则基于 base_embeddings 新建
         """
         self.api_key = api_key
         self.model = model
         self.language = language
         
-        
-        # 设置代理（如果需要）
-        proxies = os.getenv("HTTPS_PROXY") or os.getenv("HTTP_PROXY")
-        if proxies:
-            # 对于需要代理的情况，可以设置环境变量
-            os.environ["OPENAI_PROXY"] = proxies
-
         # 初始化OpenAI组件 - 使用兼容的参数
-        self.llm = ChatOpenAI(
-            temperature=0,  # 降低到0提高速度
-            model_name=model,  # 使用 model_name 而不是 model
-            openai_api_key=api_key,
-            max_tokens=400,  # 减少token数量以加快响应
-            request_timeout=30,  # 减少超时时间
-            streaming=False  # 禁用流式传输以获得完整响应
-        )
+        self.llm = llm or self.create_llm(api_key, model)
         
-        self.embeddings = OpenAIEmbeddings(
-            openai_api_key=api_key
+        # 查询向量带缓存，可通过 prewarm_query_embeddings 批量预计算
+        # （默认缓存按实例区分，也可传入共享缓存；底层HTTP客户端可共享）
+        self.embeddings = embeddings or QueryCachedEmbeddings(
+            base_embeddings or self.create_base_embeddings(api_key)
         )
         
         # 文本分割器 - 智能分块（优化：减小块大小提高检索速度）
@@ -113,6 +216,30 @@ class AdvancedContractRAG:
         # 缓存目录
         self.cache_dir = Path("cache")
         self.cache_dir.mkdir(exist_ok=True)
+        
+        # 关键信息提取缓存（按文档内容指纹）
+        self._extraction_cache: Dict[str, Dict] = {}
+        self.last_extraction_cache_hit = False
+        
+        # 最近一次流式问答的完整结果（由 ask_question_stream 填充）
+        self.last_stream_result: Optional[Dict] = None
+
+    @staticmethod
+    def create_llm(api_key: str, model: str = "gpt-3.5-turbo") -> ChatOpenAI:
+        """创建问答使用的LLM客户端（无会话状态，可在多个RAG实例间共享）"""
+        return ChatOpenAI(
+            temperature=0,  # 降低到0提高速度
+            model_name=model,  # 使用 model_name 而不是 model
+            openai_api_key=api_key,
+            max_tokens=400,  # 减少token数量以加快响应
+            request_timeout=30,  # 减少超时时间
+            streaming=False  # 禁用流式传输以获得完整响应
+        )
+
+    @staticmethod
+    def create_base_embeddings(api_key: str) -> OpenAIEmbeddings:
+        """创建底层Embeddings客户端（无会话状态，可在多个RAG实例间共享）"""
+        return OpenAIEmbeddings(openai_api_key=api_key)
 
     def _normalize_text(self, text: str) -> str:
         """
@@ -125,8 +252,6 @@ class AdvancedContractRAG:
         Returns:
             标准化后的文本
         """
-        import unicodedata
-        
         # 数学斜体字符映射 (U+1D400-U+1D7FF)
         math_italic_lowercase = {
             '𝑎': 'a', '𝑏': 'b', '𝑐': 'c', '𝑑': 'd', '𝑒': 'e', '𝑓': 'f',
@@ -185,8 +310,6 @@ class AdvancedContractRAG:
         Returns:
             标准化后的Document对象列表
         """
-        from langchain.schema import Document
-        
         normalized_docs = []
         for doc in documents:
             normalized_text = self._normalize_text(doc.page_content)
@@ -198,13 +321,16 @@ class AdvancedContractRAG:
         
         return normalized_docs
        
-    def load_pdf(self, pdf_path: str, use_cache: bool = True) -> Dict:
+    def load_pdf(self, pdf_path: str, use_cache: bool = True, pdf_bytes: Optional[bytes] = None,
+                 build_index: bool = True) -> Dict:
         """
         加载并解析PDF文件
         
         Args:
             pdf_path: PDF文件路径
             use_cache: 是否使用缓存
+            pdf_bytes: 已在内存中的文件内容（如上传文件），提供时直接解析，不再重新读取磁盘
+            build_index: 是否重建向量存储；已通过 load_vectorstore 从磁盘加载索引时传 False
             
         Returns:
             包含解析结果的字典
@@ -232,7 +358,8 @@ class AdvancedContractRAG:
             with open(cache_path, 'rb') as f:
                 cached_data = pickle.load(f)
                 self.documents[str(pdf_path)] = cached_data['documents']
-                self._rebuild_vectorstore()
+                if build_index:
+                    self._rebuild_vectorstore()
                 return {"success": True, "message": "Loaded from cache", "stats": cached_data['stats']}
         
         print(f"📄 Loading PDF: {pdf_path}")
@@ -241,10 +368,16 @@ class AdvancedContractRAG:
         documents = None
    
            
+        # 内存中的文件内容直接交给解析器，来源仍记录为文件路径
+        blob = Blob.from_data(pdf_bytes, path=str(pdf_path)) if pdf_bytes is not None else None
+        
         # 方法1: PDFPlumber (最好的表格支持)
         try:
-            loader = PDFPlumberLoader(str(pdf_path))
-            documents = loader.load()
+            if blob is not None:
+                documents = PDFPlumberParser().parse(blob)
+            else:
+                loader = PDFPlumberLoader(str(pdf_path))
+                documents = loader.load()
             loader_used = "PDFPlumber"
             print(f"✅ Successfully loaded with PDFPlumber")
         except Exception as e:
@@ -253,8 +386,11 @@ class AdvancedContractRAG:
         # 方法2: PyMuPDF (最准确的文本提取)
         if documents is None or len(documents) == 0:
             try:
-                loader = PyMuPDFLoader(str(pdf_path))
-                documents = loader.load()
+                if blob is not None:
+                    documents = PyMuPDFParser().parse(blob)
+                else:
+                    loader = PyMuPDFLoader(str(pdf_path))
+                    documents = loader.load()
                 loader_used = "PyMuPDF"
                 print(f"✅ Successfully loaded with PyMuPDF")
             except Exception as e:
@@ -288,7 +424,8 @@ class AdvancedContractRAG:
         self.documents[str(pdf_path)] = split_documents
         
         # 更新向量存储
-        self._rebuild_vectorstore()
+        if build_index:
+            self._rebuild_vectorstore()
         
         # 统计信息
         stats = {
@@ -330,21 +467,43 @@ class AdvancedContractRAG:
         
         if all_documents:
             print(f"🔄 Building vector store with {len(all_documents)} chunks...")
-            self.vectorstore = FAISS.from_documents(
-                all_documents,
-                self.embeddings
+            # 文档块向量在建索引时归一化一次并使用内积索引：余弦相似度即点积，
+            # 查询向量的长度不影响排序，检索时无需再归一化
+            texts = [doc.page_content for doc in all_documents]
+            vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+            faiss.normalize_L2(vectors)
+            self.vectorstore = FAISS.from_embeddings(
+                list(zip(texts, vectors)),
+                self.embeddings,
+                metadatas=[doc.metadata for doc in all_documents],
+                distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
             )
+            if len(all_documents) >= QUANTIZE_MIN_CHUNKS:
+                self.vectorstore.index = self._quantize_index(self.vectorstore.index)
             
-            # 创建增强检索器（优化：减少检索数量以加快速度）
-            self.retriever = self.vectorstore.as_retriever(
-                search_type="similarity",  # 使用相似度搜索，速度更快
-                search_kwargs={
-                    "k": 8,  # 返回5个最相关的块
-                    #"fetch_k": 10  # 先获取10个候选
-                }
-            )
+            self._build_retriever()
             print(f"✅ Vector store ready")
     
+    @staticmethod
+    def _quantize_index(index):
+        """把 float32 平面索引转换为 int8 标量量化索引（按维度 min/max 训练，id 顺序不变）"""
+        vectors = index.reconstruct_n(0, index.ntotal)
+        quantized = faiss.IndexScalarQuantizer(index.d, faiss.ScalarQuantizer.QT_8bit, index.metric_type)
+        quantized.train(vectors)
+        quantized.add(vectors)
+        return quantized
+    
+    def _build_retriever(self):
+        """为当前向量存储创建检索器（新建与从磁盘加载的索引使用同一配置）"""
+        # 创建增强检索器（优化：减少检索数量以加快速度）
+        self.retriever = self.vectorstore.as_retriever(
+            search_type="similarity",  # 使用相似度搜索，速度更快
+            search_kwargs={
+                "k": 8,  # 返回5个最相关的块
+                #"fetch_k": 10  # 先获取10个候选
+            }
+        )
+    
     def summarize_contract(self, pdf_path: Optional[str] = None, 
                           summary_type: str = "comprehensive") -> str:
         """
@@ -476,9 +635,10 @@ class AdvancedContractRAG:
         
         return summary
     
-    def ask_question(self, question: str, use_compression: bool = False) -> Dict:
+    def ask_question(self, question: str, use_compression: bool = False, use_memory: bool = True) -> Dict:
         """
         优化版问答：默认关闭压缩以提高速度
+        use_memory=False 时不读写对话历史（用于后台预计算等独立问答，可安全并发）
         """
         if not self.vectorstore:
             return {
@@ -506,11 +666,13 @@ class AdvancedContractRAG:
         )
 
         # 从本地 memory 取历史，传给链（list[BaseMessage] / list[str] 均可）
-        try:
-            history_vars = self.memory.load_memory_variables({})
-            chat_history = history_vars.get("chat_history", [])
-        except Exception:
-            chat_history = []
+        chat_history = []
+        if use_memory:
+            try:
+                history_vars = self.memory.load_memory_variables({})
+                chat_history = history_vars.get("chat_history", [])
+            except Exception:
+                chat_history = []
 
         # 执行
         with get_openai_callback() as cb:
@@ -520,25 +682,100 @@ class AdvancedContractRAG:
             })
 
         # 手动把本轮问答写回 memory（只存 question/answer）
-        try:
-            self.memory.save_context({"question": question}, {"answer": result.get("answer", "")})
-        except Exception:
-            pass
+        if use_memory:
+            self._remember(question, result.get("answer", ""))
 
         # ⭐ 改进的来源匹配逻辑：根据答案内容筛选最相关的来源
         answer_text = result.get("answer", "")
         source_documents = result.get("source_documents", [])
         
+        return {
+            "answer": answer_text,
+            "sources": self._select_sources(answer_text, source_documents),
+            "tokens_used": cb.total_tokens if "cb" in locals() else 0
+        }
+
+    def is_relevant_question(self, question: str) -> bool:
+        """
+        低成本判断问题是否需要检索和调用LLM，用于拦截空输入和寒暄
+        
+        Args:
+            question: 用户问题
+            
+        Returns:
+            False 表示输入为空或只是寒暄
+        """
+        return bool(question.strip()) and not SMALL_TALK_PATTERN.match(question)
+
+    def ask_question_stream(self, question: str) -> Iterator[str]:
+        """
+        流式问答：逐段产出答案文本，首个token生成后即可显示
+        检索、追问改写与来源筛选均与 ask_question 相同；
+        生成结束后完整结果（answer/sources/tokens_used）保存在 self.last_stream_result
+        """
+        self.last_stream_result = None
+        if not self.vectorstore:
+            answer_text = "No contract loaded. Please upload a PDF contract first."
+            self.last_stream_result = {"answer": answer_text, "sources": []}
+            yield answer_text
+            return
+
+        try:
+            history_vars = self.memory.load_memory_variables({})
+            chat_history = history_vars.get("chat_history", [])
+        except Exception:
+            chat_history = []
+
+        # 有对话历史时先把追问改写为独立问题（与 ConversationalRetrievalChain 一致）
+        standalone_question = question
+        if chat_history:
+            standalone_question = self.llm.invoke(CONDENSE_QUESTION_PROMPT.format(
+                question=question,
+                chat_history=_get_chat_history(chat_history)
+            )).content
+
+        source_documents = self.retriever.invoke(standalone_question)
+        messages = PROMPT_SELECTOR.get_prompt(self.llm).format_messages(
+            context="\n\n".join(doc.page_content for doc in source_documents),
+            question=standalone_question
+        )
+
+        parts = []
+        for chunk in self.llm.stream(messages):
+            if chunk.content:
+                parts.append(chunk.content)
+                yield chunk.content
+        answer_text = "".join(parts)
+
+        self._remember(question, answer_text)
+
+        # 流式响应不返回token用量
+        self.last_stream_result = {
+            "answer": answer_text,
+            "sources": self._select_sources(answer_text, source_documents),
+            "tokens_used": 0
+        }
+
+    def _remember(self, question: str, answer: str):
+        """
+        写入一轮问答到对话记忆，并只保留窗口内的消息
+        （窗口记忆只把最近 k 轮放进提示词，但底层消息列表本身会无限增长）
+        """
+        try:
+            self.memory.save_context({"question": question}, {"answer": answer})
+            messages = self.memory.chat_memory.messages
+            if len(messages) > 2 * self.memory.k:
+                del messages[:-2 * self.memory.k]
+        except Exception:
+            pass
+
+    def _select_sources(self, answer_text: str, source_documents: List[Document]) -> List[Dict]:
+        """根据答案中的数字、日期和关键词，从检索到的文档中筛选最相关的来源（最多3个）"""
         # 如果没有明确答案或来源，返回空
         if not answer_text or not source_documents:
-            return {
-                "answer": answer_text,
-                "sources": [],
-                "tokens_used": cb.total_tokens if "cb" in locals() else 0
-            }
+            return []
         
         # 提取答案中的关键信息（数字、金额、日期等）
-        import re
         answer_keywords = set()
         
         # 提取数字（包括金额）
@@ -614,11 +851,7 @@ class AdvancedContractRAG:
             # 只保留分数最高的那个
             sources = sources[:1]
         
-        return {
-            "answer": answer_text,
-            "sources": sources,
-            "tokens_used": cb.total_tokens if "cb" in locals() else 0
-        }
+        return sources
 
     
     
@@ -668,17 +901,46 @@ class AdvancedContractRAG:
         
         return comparison
     
-    def extract_key_information(self) -> Dict:
+    def _documents_fingerprint(self) -> str:
+        """根据已加载文档的分块内容和模型生成指纹（仅作缓存键，优先使用更快的 xxh3）"""
+        h = xxhash.xxh3_128(self.model.encode()) if XXHASH_AVAILABLE else hashlib.sha256(self.model.encode())
+        for path in sorted(self.documents):
+            for doc in self.documents[path]:
+                h.update(doc.page_content.encode("utf-8", "ignore"))
+        return h.hexdigest()
+
+    def extract_key_information(self, use_cache: bool = True) -> Dict:
         """
         提取合同关键信息到结构化格式（优先从摘要提取）
         
+        Args:
+            use_cache: 同一份合同内容直接返回之前的提取结果（内存 + 磁盘）
+        
         Returns:
             包含关键信息的字典
         """
+        self.last_extraction_cache_hit = False
+
         # 若未加载向量库，但已有文档，也可直接生成摘要
         if not self.documents:
             return {"error": "No contract loaded"}
 
+        # 检查提取缓存
+        cache_key = self._documents_fingerprint()
+        cache_path = self.cache_dir / f"extraction_{cache_key}.json"
+        if use_cache:
+            cached = self._extraction_cache.get(cache_key)
+            if cached is None and cache_path.exists():
+                try:
+                    with open(cache_path, 'r', encoding='utf-8') as f:
+                        cached = json.load(f)
+                    self._extraction_cache[cache_key] = cached
+                except (OSError, ValueError):
+                    cached = None
+            if cached is not None:
+                self.last_extraction_cache_hit = True
+                return dict(cached)
+
         # 先生成综合摘要
         summary_text = self.summarize_contract(summary_type="comprehensive")
 
@@ -709,13 +971,15 @@ class AdvancedContractRAG:
         chain = LLMChain(llm=self.llm, prompt=prompt)
         raw = chain.run(summary=summary_text)
 
-        # 尝试解析JSON；失败则回退为全部字段"Not mentioned"
-        import json, re
+        # 尝试解析JSON；失败则回退为全部字段"Not mentioned"（该结果不写入缓存）
         try:
             # 可能模型返回包含代码块，先抽取JSON片段
             match = re.search(r"\{[\s\S]*\}", raw)
             data = json.loads(match.group(0) if match else raw)
         except Exception:
+            data = None
+        parsed = isinstance(data, dict)
+        if not parsed:
             data = {}
 
         # 统一字段与回退值
@@ -747,6 +1011,15 @@ class AdvancedContractRAG:
                     if ans and ans.lower() not in {"not mentioned", "unknown", "not specified"}:
                         extracted_info[k] = self._simplify_answer(ans, k)
 
+        # 只缓存成功解析的结果，避免一次失败在之后每次运行中被重放
+        if use_cache and parsed:
+            self._extraction_cache[cache_key] = dict(extracted_info)
+            try:
+                with open(cache_path, 'w', encoding='utf-8') as f:
+                    json.dump(extracted_info, f, ensure_ascii=False)
+            except OSError as e:
+                print(f"⚠️ Failed to write extraction cache: {e}")
+
         return extracted_info
     
 
@@ -777,7 +1050,6 @@ class AdvancedContractRAG:
         chain = LLMChain(llm=self.llm, prompt=prompt)
         raw = chain.run(summary=summary_text)
 
-        import json, re
         try:
             match = re.search(r"\{[\s\S]*\}", raw)
             data = json.loads(match.group(0) if match else raw)
@@ -805,13 +1077,19 @@ class AdvancedContractRAG:
                 "parking": "What parking arrangements or spaces are provided?"
             }
 
-            # 顺序回填（避免API过多并发）
-            for k, v in info.items():
-                if v == "Not mentioned":
-                    qa = self.ask_question(fallback_queries[k], use_compression=False)
-                    ans = qa.get("answer", "").strip()
-                    if ans and ans.lower() not in {"not mentioned", "unknown", "not specified"}:
-                        info[k] = self._simplify_answer(ans, k)
+            # 并发回填缺失项：各字段互相独立，总耗时约为最慢的一次调用（限制并发数，避免API过多并发）
+            # 不读写对话记忆，既能安全并发，也不会把回填问题混进用户的对话历史
+            missing = [k for k, v in info.items() if v == "Not mentioned"]
+            if missing:
+                with ThreadPoolExecutor(max_workers=min(len(missing), EXTRACTION_MAX_WORKERS)) as executor:
+                    answers = executor.map(
+                        lambda k: self.ask_question(fallback_queries[k], use_compression=False, use_memory=False),
+                        missing
+                    )
+                    for k, qa in zip(missing, answers):
+                        ans = qa.get("answer", "").strip()
+                        if ans and ans.lower() not in {"not mentioned", "unknown", "not specified"}:
+                            info[k] = self._simplify_answer(ans, k)
 
         return info
         with ThreadPoolExecutor(max_workers=10) as executor:
@@ -883,8 +1161,6 @@ class AdvancedContractRAG:
         Returns:
             简化的答案
         """
-        import re
-        
         # 如果答案已经是简短的，直接返回
         if len(answer.strip()) <= 60:
             return answer.strip()
@@ -1072,10 +1348,39 @@ class AdvancedContractRAG:
         
         return simplified
 
+    def set_embedding_store(self, store):
+        """
+        设置文档块向量的持久化存储（如 backend.EmbeddingCache）
+        
+        Args:
+            store: 提供 get_many / put_many 的存储对象，None 表示不缓存
+        """
+        self.embeddings.document_store = store
+
+    def prewarm_query_embeddings(self, queries: List[str]) -> int:
+        """
+        一次批量请求计算多个问题的查询向量，之后检索时直接命中缓存
+        
+        Args:
+            queries: 之后将要提问的问题列表
+            
+        Returns:
+            新计算的向量数量
+        """
+        return self.embeddings.prewarm(queries)
+
     def clear_memory(self):
         """清除对话历史"""
         self.memory.clear()
         print("🧹 Conversation memory cleared")
+
+    def has_conversation_history(self) -> bool:
+        """对话记忆中是否已有历史（有历史时新问题可能是依赖上下文的追问）"""
+        return bool(self.memory.chat_memory.messages)
+
+    def remember_exchange(self, question: str, answer: str):
+        """把未经 ask_question 产生的一轮问答（如缓存命中）写入对话记忆，供后续追问使用"""
+        self._remember(question, answer)
     
     def save_vectorstore(self, path: str = "vectorstore"):
         """保存向量存储到磁盘"""
@@ -1101,17 +1406,37 @@ class AdvancedContractRAG:
                 self.embeddings,
                 allow_dangerous_deserialization=allow_dangerous_deserialization
             )
-            self.retriever = self.vectorstore.as_retriever(
-                search_type="mmr",
-                search_kwargs={
-                    "k": 5,
-                    "fetch_k": 10
-                }
-            )
+            # 距离类型不随 save_local 保存，按索引本身的度量恢复（旧的 L2 索引保持不变）
+            if self.vectorstore.index.metric_type == faiss.METRIC_INNER_PRODUCT:
+                self.vectorstore.distance_strategy = DistanceStrategy.MAX_INNER_PRODUCT
+            self._build_retriever()
             print(f"📂 Vector store loaded from {path}")
         else:
             print(f"⚠️ Vector store path not found: {path}")
 
+    def restore_documents_from_vectorstore(self, pdf_path: str) -> bool:
+        """
+        用已加载向量存储的 docstore 恢复文档块列表，无需再读取一份文档缓存
+        
+        Args:
+            pdf_path: 文档块所属的 PDF 路径（作为 self.documents 的键）
+            
+        Returns:
+            是否恢复成功（向量存储为空或映射不完整时返回 False）
+        """
+        if not self.vectorstore:
+            return False
+        docstore = self.vectorstore.docstore
+        mapping = self.vectorstore.index_to_docstore_id
+        try:
+            documents = [docstore.search(mapping[i]) for i in range(len(mapping))]
+        except KeyError:
+            return False
+        if not documents or not all(isinstance(doc, Document) for doc in documents):
+            return False
+        self.documents[str(pdf_path)] = documents
+        return True
+
     def get_statistics(self) -> Dict:
         """获取系统统计信息"""
         total_chunks = sum(len(docs) for docs in self.documents.values())